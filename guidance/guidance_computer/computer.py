@@ -1,8 +1,52 @@
+import os
+
 from . import *
+from . import terrain
+from . import scheduler
 
 class Computer(object):
-    def __init__(self, map_file='~/Desktop/atlas/guidance/guidance_computer/moon.map'):
+    def __init__(self, map_file='~/Desktop/atlas/guidance/guidance_computer/moon.map', max_tiles=64):
         self.map = map_file
+        self.max_tiles = max_tiles
+        self._terrain = None
+        self.vehicle = None
+        self.target = [0.0, 0.0, 0.0]  # forward, yaw, pitch
+
+    @property
+    def terrain(self):
+        """
+        The TerrainMap behind self.map, opened on first use.
+        """
+        if self._terrain is None:
+            self._terrain = terrain.TerrainMap(os.path.expanduser(self.map), max_tiles=self.max_tiles)
+        return self._terrain
+
+    def set(self, vehicle):
+        """
+        - input:
+            - vehicle: object
+                Anything with sense(measurement) and actuate(command),
+                e.g. scheduler.SimulatedVehicle.
+        """
+        self.vehicle = vehicle
     
-    def input(self):
-        pass
\ No newline at end of file
+    def input(self, measurement):
+        """
+        Read the vehicle sensors into the measurement buffer.
+        """
+        self.vehicle.sense(measurement)
+
+    def command(self, state, command):
+        command[scheduler.ATTITUDE] = self.target
+
+    def launch(self, forward, reverse=None, yaw=0.0, pitch=0.0, rate=100.0, duration=None, cycles=None):
+        """
+        Fly the attached vehicle towards forward/yaw/pitch with a
+        fixed-rate guidance loop.
+
+        returns:
+            - scheduler.GuidanceLoop, with its latency stats filled in
+        """
+        self.target = [forward if reverse is None else -reverse, yaw, pitch]
+        loop = scheduler.GuidanceLoop(rate, self.input, self.command, self.vehicle.actuate)
+        return loop.run(cycles=cycles, duration=duration)
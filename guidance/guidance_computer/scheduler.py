@@ -0,0 +1,207 @@
+"""
+Fixed-rate sense -> estimate -> command loop for the guidance computer.
+
+Ticks are scheduled on absolute monotonic times (start + k * period),
+so a slow cycle never pushes the later ones back. Every stage works on
+buffers allocated once in GuidanceLoop.__init__.
+"""
+import bisect
+import math
+import time
+
+import numpy as np
+
+# measurement / state / command layout
+POSITION = slice(0, 3)
+VELOCITY = slice(3, 6)
+ATTITUDE = slice(6, 9)   # forward, yaw, pitch
+
+
+class LatencyHistogram(object):
+    """
+    Log spaced histogram of durations in seconds.
+
+    - input:
+        - low, high: float
+            Smallest and largest bin edge in seconds. Anything outside
+            lands in the first or last bin.
+        - bins: int
+    """
+    def __init__(self, low=1e-6, high=1.0, bins=120):
+        self.edges = np.geomspace(low, high, bins + 1).tolist()
+        self.counts = [0]*(bins + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_right(self.edges, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+        The q-th percentile, interpolated within its bin. The bins are
+        narrowed to the smallest and largest duration seen, so no
+        percentile lies outside them.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q/100.0*self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lower = max(self.edges[i - 1] if i > 0 else self.min, self.min)
+                upper = min(self.edges[i] if i < len(self.edges) else self.max, self.max)
+                return lower + (upper - lower)*max(rank - seen, 0)/c
+            seen += c
+        return self.max
+
+    def summary(self):
+        mean = self.total/self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean": mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+class SimulatedVehicle(object):
+    """
+    Point mass with first-order attitude response, for running the loop
+    without hardware.
+
+    - input:
+        - noise: float
+            Standard deviation of the position sensor noise in meters.
+        - seed: int
+    """
+    def __init__(self, noise=0.05, seed=0):
+        self.state = np.zeros(9)
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+        self._noise = np.empty(3)
+        self._last = time.monotonic()
+
+    def sense(self, measurement):
+        now = time.monotonic()
+        dt = now - self._last
+        self._last = now
+        self.state[POSITION] += self.state[VELOCITY]*dt
+        measurement[:] = self.state
+        self._rng.standard_normal(out=self._noise)
+        measurement[POSITION] += self.noise*self._noise
+
+    def actuate(self, command):
+        # velocity follows the commanded forward speed along the attitude
+        self.state[ATTITUDE] += 0.1*(command[ATTITUDE] - self.state[ATTITUDE])
+        forward, yaw, pitch = self.state[ATTITUDE]
+        self.state[VELOCITY] = forward*np.cos(pitch)*np.cos(yaw), \
+            forward*np.cos(pitch)*np.sin(yaw), forward*np.sin(pitch)
+
+
+def alpha_beta(measurement, state, dt, alpha=0.5, beta=0.1):
+    """
+    Default estimator: alpha-beta filter on position, attitude passed through.
+    """
+    predicted = state[POSITION] + state[VELOCITY]*dt
+    residual = measurement[POSITION] - predicted
+    state[POSITION] = predicted + alpha*residual
+    state[VELOCITY] += beta/dt*residual
+    state[ATTITUDE] = measurement[ATTITUDE]
+
+
+class GuidanceLoop(object):
+    """
+    Run sense -> estimate -> command at a fixed rate.
+
+    - input:
+        - rate: float
+            Loop frequency in Hz.
+        - sense: function(measurement)
+            Fills the measurement buffer, e.g. Computer.input.
+        - command: function(state, command)
+            Fills the command buffer from the estimated state.
+        - actuate: function(command)
+            Sends the command out.
+        - estimate: function(measurement, state, dt)
+            Updates the state buffer. Defaults to alpha_beta.
+        - spin: float
+            Seconds before a tick to stop sleeping and busy wait,
+            trades CPU for less wake-up jitter.
+    """
+    def __init__(self, rate, sense, command, actuate, estimate=alpha_beta, spin=0.0002):
+        self.period = 1.0/rate
+        self.sense = sense
+        self.estimate = estimate
+        self.command_fn = command
+        self.actuate = actuate
+        self.spin = spin
+
+        self.measurement = np.zeros(9)
+        self.state = np.zeros(9)
+        self.command = np.zeros(9)
+
+        self.latency = LatencyHistogram()
+        self.jitter = LatencyHistogram()
+        self.misses = 0
+        self.cycles = 0
+
+    def step(self):
+        self.sense(self.measurement)
+        self.estimate(self.measurement, self.state, self.period)
+        self.command_fn(self.state, self.command)
+        self.actuate(self.command)
+
+    def run(self, cycles=None, duration=None):
+        """
+        Run until `cycles` ticks or `duration` seconds have gone by.
+
+        returns:
+            - self, so callers can read latency, jitter and misses
+        """
+        clock = time.perf_counter
+        start = clock()
+        end = start + duration if duration is not None else float('inf')
+        tick = 0
+        while cycles is None or self.cycles < cycles:
+            deadline = start + tick*self.period
+            if deadline >= end:
+                break
+            now = clock()
+            if deadline - now > self.spin:
+                time.sleep(deadline - now - self.spin)
+            while clock() < deadline:
+                pass
+
+            begin = clock()
+            self.jitter.record(begin - deadline)
+            self.step()
+            done = clock()
+            self.latency.record(done - begin)
+            self.cycles += 1
+
+            tick += 1
+            late = done - (start + tick*self.period)
+            if late > 0:
+                # skip the ticks we overran instead of bunching them up
+                skipped = int(late // self.period) + 1
+                self.misses += skipped
+                tick += skipped
+        return self
+
+    def report(self):
+        return {
+            "cycles": self.cycles,
+            "misses": self.misses,
+            "latency": self.latency.summary(),
+            "jitter": self.jitter.summary(),
+        }
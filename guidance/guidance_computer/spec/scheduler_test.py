@@ -0,0 +1,40 @@
+"""
+LatencyHistogram percentiles against the exact ones.
+
+Run with pytest from the repository root:
+
+    python -m pytest guidance/guidance_computer/spec
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, ROOT)
+
+from guidance.guidance_computer import scheduler
+
+
+def _histogram(samples):
+    histogram = scheduler.LatencyHistogram()
+    for seconds in samples:
+        histogram.record(seconds)
+    return histogram
+
+
+def test_percentiles_within_range():
+    rng = np.random.default_rng(0)
+    for samples in (rng.uniform(2.3e-4, 2.61e-4, 1000),   # all in a few bins
+                    rng.uniform(1e-8, 5e-7, 1000),        # below the first edge
+                    rng.lognormal(-8, 1, 5000)):
+        summary = _histogram(samples).summary()
+        assert samples.min() <= summary["p50"] <= summary["p99"] <= summary["p99.9"] <= summary["max"]
+        # a bin is 12% wide
+        for q in (50, 99):
+            assert abs(summary["p{}".format(q)]/np.percentile(samples, q) - 1) < 0.12
+
+
+def test_single_sample():
+    summary = _histogram([0.5]).summary()
+    assert summary["p50"] == summary["p99"] == summary["max"] == 0.5
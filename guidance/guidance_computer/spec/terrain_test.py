@@ -0,0 +1,76 @@
+"""
+HazardIndex against brute force, and maps at the edge of the format.
+
+Run with pytest from the repository root:
+
+    python -m pytest guidance/guidance_computer/spec
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, ROOT)
+
+from guidance.guidance_computer import terrain
+
+
+def _hazards(n, seed=0):
+    rng = np.random.default_rng(seed)
+    hazards = np.zeros(n, dtype=terrain.HAZARD)
+    hazards['x'] = rng.uniform(0, 2000, n)
+    hazards['y'] = rng.uniform(0, 1000, n)
+    # mostly small, a few large ones that reach past their neighbours
+    hazards['radius'] = np.where(rng.random(n) < 0.05, rng.uniform(50, 150, n), rng.uniform(1, 10, n))
+    return hazards
+
+
+def test_hazard_index_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for n, cell in ((1, 64.0), (40, 64.0), (3000, 64.0), (3000, 7.0)):
+        hazards = _hazards(n)
+        index = terrain.HazardIndex(hazards, cell)
+        # inside and well outside the hazard field
+        for x, y in rng.uniform(-500, 2500, (200, 2)):
+            center = np.hypot(hazards['x'] - x, hazards['y'] - y)
+            edge = center - hazards['radius']
+
+            i, d = index.nearest(x, y)
+            assert d == center.min()
+            assert center[i] == d
+
+            j, c = index.clearance(x, y)
+            assert np.isclose(c, edge.min())
+            assert np.isclose(edge[j], edge.min())
+
+            radius = rng.uniform(0, 100)
+            np.testing.assert_array_equal(np.sort(index.within(x, y, radius)),
+                                          np.flatnonzero(edge <= radius))
+
+
+def test_no_hazards():
+    index = terrain.HazardIndex(np.zeros(0, dtype=terrain.HAZARD), 10.0)
+    assert index.nearest(1.0, 2.0) == (None, float('inf'))
+    assert index.clearance(1.0, 2.0) == (None, float('inf'))
+    assert len(index.within(1.0, 2.0, 100.0)) == 0
+
+
+def test_empty_map(tmp_path):
+    path = str(tmp_path/'empty.map')
+    terrain.write_map(path, np.zeros((0, 0)), hazards=[(5.0, 5.0, 2.0)])
+    with terrain.TerrainMap(path) as empty:
+        assert len(empty.table) == 0
+        assert empty.nearest_hazard(5.0, 8.0) == (0, 3.0)
+
+
+def test_map_round_trip(tmp_path):
+    path = str(tmp_path/'small.map')
+    elevation = np.random.default_rng(2).normal(size=(70, 90)).astype(np.float32)
+    hazards = _hazards(25)
+    terrain.write_map(path, elevation, tile_size=32, resolution=2.0, hazards=hazards)
+    with terrain.TerrainMap(path, max_tiles=2) as small:
+        iy, ix = np.mgrid[0:70, 0:90]
+        np.testing.assert_array_equal(small.cells(ix, iy), elevation)
+        assert small.elevation(2.0*17, 2.0*33) == elevation[33, 17]
+        np.testing.assert_array_equal(small.hazards.hazards, hazards)
@@ -0,0 +1,324 @@
+"""
+Tiled terrain maps for the guidance computer.
+
+File layout (little endian):
+
+    header      MAGIC, version, tile size, width, height, resolution,
+                number of hazards
+    tile table  (offset, length) of every zlib compressed tile, row major
+    tiles       float32 elevations, tile_size x tile_size each
+    hazards     (x, y, radius) float64 rows
+
+The file is memory-mapped and a tile is only inflated the first time a
+query touches it. Inflated tiles live in a bounded LRU.
+"""
+import mmap
+import struct
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+MAGIC = b'ATMP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIdI')
+TILE_ENTRY = np.dtype([('offset', '<u8'), ('length', '<u4')])
+HAZARD = np.dtype([('x', '<f8'), ('y', '<f8'), ('radius', '<f8')])
+
+
+def write_map(path, elevation, tile_size=256, resolution=1.0, hazards=()):
+    """
+    Write an elevation grid as a tiled map.
+
+    - input:
+        - path: string
+        - elevation: 2D array
+            Elevation in meters, indexed [row, column] = [y, x].
+        - tile_size: int
+            Cells per tile side.
+        - resolution: float
+            Meters per cell.
+        - hazards: list of (x, y, radius)
+            Hazard centers and radii in meters.
+    """
+    elevation = np.asarray(elevation, dtype='<f4')
+    height, width = elevation.shape
+    tiles_y = -(-height // tile_size)
+    tiles_x = -(-width // tile_size)
+    hazards = np.array([tuple(h) for h in hazards], dtype=HAZARD)
+
+    table = np.zeros(tiles_x*tiles_y, dtype=TILE_ENTRY)
+    blobs = []
+    offset = HEADER.size + table.nbytes
+    for ty in range(tiles_y):
+        for tx in range(tiles_x):
+            # edge tiles are padded with their last row/column
+            tile = np.empty((tile_size, tile_size), dtype='<f4')
+            part = elevation[ty*tile_size:(ty + 1)*tile_size, tx*tile_size:(tx + 1)*tile_size]
+            tile[:] = np.pad(part, ((0, tile_size - part.shape[0]),
+                                    (0, tile_size - part.shape[1])), mode='edge')
+            blob = zlib.compress(tile.tobytes(), 6)
+            table[ty*tiles_x + tx] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, tile_size, width, height, resolution, len(hazards)))
+        file.write(table.tobytes())
+        for blob in blobs:
+            file.write(blob)
+        file.write(hazards.tobytes())
+
+
+class HazardIndex(object):
+    """
+    Uniform grid over hazard centers for nearest and radius queries.
+
+    - input:
+        - hazards: array of HAZARD rows
+        - cell: float
+            Grid cell size in meters.
+    """
+    def __init__(self, hazards, cell):
+        self.hazards = hazards
+        self.cell = float(cell)
+        self.x = np.ascontiguousarray(hazards['x'])
+        self.y = np.ascontiguousarray(hazards['y'])
+        cx = np.floor(self.x/self.cell).astype(np.int64)
+        cy = np.floor(self.y/self.cell).astype(np.int64)
+        # compressed buckets: hazards sorted by cell, cell -> (start, stop)
+        order = np.lexsort((cx, cy))
+        self.order = order
+        self.buckets = {}
+        keys = list(zip(cx[order].tolist(), cy[order].tolist()))
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                self.buckets[keys[start]] = (start, i)
+                start = i
+        if len(keys):
+            self.bounds = (int(cx.min()), int(cx.max()), int(cy.min()), int(cy.max()))
+        else:
+            self.bounds = None
+
+    def _cell(self, x, y):
+        return int(np.floor(x/self.cell)), int(np.floor(y/self.cell))
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for i in range(-r, r + 1):
+            yield cx + i, cy - r
+            yield cx + i, cy + r
+        for j in range(-r + 1, r):
+            yield cx - r, cy + j
+            yield cx + r, cy + j
+
+    def nearest(self, x, y):
+        """
+        Closest hazard center to (x, y).
+
+        returns:
+            - (index into hazards, distance), or (None, inf) without hazards
+        """
+        best, best_d = None, float('inf')
+        if self.bounds is None:
+            return best, best_d
+        cx, cy = self._cell(x, y)
+        x0, x1, y0, y1 = self.bounds
+        r = 0
+        while r <= max(cx - x0, x1 - cx, cy - y0, y1 - cy):
+            for key in self._ring(cx, cy, r):
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    continue
+                ids = self.order[bucket[0]:bucket[1]]
+                d = np.hypot(self.x[ids] - x, self.y[ids] - y)
+                i = int(np.argmin(d))
+                if d[i] < best_d:
+                    best, best_d = int(ids[i]), float(d[i])
+            # every cell outside ring r is at least r cells away
+            if best is not None and best_d <= r*self.cell:
+                break
+            r += 1
+        return best, best_d
+
+    def within(self, x, y, radius):
+        """
+        Indices of hazards whose area comes within `radius` of (x, y).
+        """
+        reach = radius + (self.hazards['radius'].max() if len(self.hazards) else 0.0)
+        x0, y0 = self._cell(x - reach, y - reach)
+        x1, y1 = self._cell(x + reach, y + reach)
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.buckets.get((cx, cy))
+                if bucket is not None:
+                    found.append(self.order[bucket[0]:bucket[1]])
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        ids = np.concatenate(found)
+        d = np.hypot(self.x[ids] - x, self.y[ids] - y) - self.hazards['radius'][ids]
+        return ids[d <= radius]
+
+    def clearance(self, x, y):
+        """
+        Closest hazard edge to (x, y). The hazard with the closest center
+        need not be it, a larger one further out can reach nearer.
+
+        returns:
+            - (index into hazards, distance to its edge, negative inside
+              it), or (None, inf) without hazards
+        """
+        j, d = self.nearest(x, y)
+        if j is None:
+            return j, d
+        # no edge is closer than this one's, so only hazards centered
+        # within d - radius + max radius can beat it
+        bound = d - self.hazards['radius'][j]
+        ids = self.within(x, y, bound)
+        if not len(ids):
+            return j, float(bound)
+        edge = np.hypot(self.x[ids] - x, self.y[ids] - y) - self.hazards['radius'][ids]
+        i = int(np.argmin(edge))
+        return int(ids[i]), float(min(edge[i], bound))
+
+
+class TerrainMap(object):
+    """
+    A tiled map opened with write_map's layout.
+
+    - input:
+        - path: string
+        - max_tiles: int
+            Inflated tiles to keep around.
+        - hazard_cell: float
+            Grid cell of the hazard index in meters. Defaults to one tile.
+    """
+    def __init__(self, path, max_tiles=64, hazard_cell=None):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.tile_size, self.width, self.height, self.resolution, n_hazards = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a version {} terrain map".format(path, VERSION))
+        self.tiles_x = -(-self.width // self.tile_size)
+        self.tiles_y = -(-self.height // self.tile_size)
+        self.table = np.frombuffer(self._mm, dtype=TILE_ENTRY,
+                                   count=self.tiles_x*self.tiles_y, offset=HEADER.size)
+        # hazards follow the last tile, or the table of a map without any
+        end = (int(self.table['offset'][-1]) + int(self.table['length'][-1]) if len(self.table)
+               else HEADER.size)
+        hazards = np.frombuffer(self._mm, dtype=HAZARD, count=n_hazards, offset=end)
+        if hazard_cell is None:
+            hazard_cell = self.tile_size*self.resolution
+        self.hazards = HazardIndex(hazards, hazard_cell)
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self.misses = 0
+
+    def close(self):
+        self.table = None
+        self.hazards = None
+        self._tiles.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tile(self, tx, ty):
+        """
+        Elevations of one tile, inflated on first use.
+        """
+        key = ty*self.tiles_x + tx
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+        self.misses += 1
+        offset, length = int(self.table['offset'][key]), int(self.table['length'][key])
+        raw = zlib.decompress(self._mm[offset:offset + length])
+        tile = np.frombuffer(raw, dtype='<f4').reshape(self.tile_size, self.tile_size)
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def cells(self, ix, iy):
+        """
+        Elevation of grid cells, clamped to the map edges.
+        """
+        ix = np.clip(np.asarray(ix, dtype=np.int64), 0, self.width - 1)
+        iy = np.clip(np.asarray(iy, dtype=np.int64), 0, self.height - 1)
+        out = np.empty(np.broadcast(ix, iy).shape, dtype=np.float32)
+        ix, iy = np.broadcast_arrays(ix, iy)
+        keys = (iy // self.tile_size)*self.tiles_x + ix // self.tile_size
+        # one pass per tile touched, not per point
+        for key in np.unique(keys):
+            mask = keys == key
+            tile = self.tile(int(key) % self.tiles_x, int(key) // self.tiles_x)
+            out[mask] = tile[iy[mask] % self.tile_size, ix[mask] % self.tile_size]
+        return out
+
+    def cell(self, ix, iy):
+        """
+        Elevation of one grid cell, clamped to the map edges.
+        """
+        ix = min(max(ix, 0), self.width - 1)
+        iy = min(max(iy, 0), self.height - 1)
+        n = self.tile_size
+        return float(self.tile(ix // n, iy // n)[iy % n, ix % n])
+
+    def elevation(self, x, y):
+        """
+        Bilinear elevation at world coordinates.
+
+        - input:
+            - x, y: float or array
+                Meters from the map origin.
+
+        returns:
+            - float for scalar input, otherwise an array
+        """
+        if np.ndim(x) == 0 and np.ndim(y) == 0:
+            # plain Python is several times faster than numpy for one point
+            gx = x/self.resolution
+            gy = y/self.resolution
+            x0 = int(gx // 1)
+            y0 = int(gy // 1)
+            fx = gx - x0
+            fy = gy - y0
+            return ((self.cell(x0, y0)*(1 - fx) + self.cell(x0 + 1, y0)*fx)*(1 - fy) +
+                    (self.cell(x0, y0 + 1)*(1 - fx) + self.cell(x0 + 1, y0 + 1)*fx)*fy)
+        gx = np.asarray(x, dtype=np.float64)/self.resolution
+        gy = np.asarray(y, dtype=np.float64)/self.resolution
+        x0 = np.floor(gx)
+        y0 = np.floor(gy)
+        fx = gx - x0
+        fy = gy - y0
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+        # all four corners in one gather
+        ix = np.stack([x0, x0 + 1, x0, x0 + 1])
+        iy = np.stack([y0, y0, y0 + 1, y0 + 1])
+        z00, z10, z01, z11 = self.cells(ix, iy)
+        return (z00*(1 - fx) + z10*fx)*(1 - fy) + (z01*(1 - fx) + z11*fx)*fy
+
+    def nearest_hazard(self, x, y):
+        return self.hazards.nearest(x, y)
+
+    def path_clearance(self, xs, ys):
+        """
+        Distance from every point of a planned path to the closest hazard
+        edge (negative inside a hazard), and the terrain elevation under it.
+        """
+        clearance = np.empty(len(xs))
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            clearance[i] = self.hazards.clearance(x, y)[1]
+        return clearance, self.elevation(xs, ys)
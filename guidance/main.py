@@ -1,10 +1,32 @@
-from guidance_computer import guidance
-from ..config import atlas_config
-
-guidance.set(atlas_config.rocket)
-guidance.launch([
-    forward = atlas_config.forward,
-    reverse = None,
-    yaw = atlas_config.yaw,
-    pitch = atlas_config.pitch
-])
\ No newline at end of file
+"""
+Run the guidance loop headless against a simulated vehicle and report
+loop latency and jitter.
+
+    python guidance/main.py --rate 100 --seconds 10
+"""
+import argparse
+import json
+
+from guidance_computer import computer
+from guidance_computer import scheduler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Atlas guidance loop')
+    parser.add_argument('--rate', type=float, default=100.0, help='Loop frequency in Hz')
+    parser.add_argument('--seconds', type=float, default=10.0, help='How long to run')
+    parser.add_argument('--forward', type=float, default=10.0)
+    parser.add_argument('--yaw', type=float, default=0.0)
+    parser.add_argument('--pitch', type=float, default=0.1)
+    args = parser.parse_args()
+
+    guidance = computer.Computer()
+    guidance.set(scheduler.SimulatedVehicle())
+    loop = guidance.launch(
+        forward = args.forward,
+        reverse = None,
+        yaw = args.yaw,
+        pitch = args.pitch,
+        rate = args.rate,
+        duration = args.seconds
+    )
+    print(json.dumps(loop.report(), indent=2))
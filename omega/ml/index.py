@@ -1 +1,5 @@
-import tensorflow as tf
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+
+from shared.backend import tf  # TensorFlow is loaded on first use
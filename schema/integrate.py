@@ -0,0 +1,229 @@
+"""
+ODE integrators for schema.rocket.
+
+Every method is a stepper registered in METHODS, so a new scheme only
+has to provide a step function:
+
+    step(f, t, y, f0, h) -> (y_new, f_new, err, nfev)
+
+`f0` is f(t, y), handed in so a method can reuse it. `err` is None for
+fixed-step methods and a local error estimate for adaptive ones.
+"""
+import numpy as np
+
+
+class Event(object):
+    """
+    A zero crossing of g(t, y) that integrate() should look for.
+
+    - input:
+        - name: string
+        - g: function(t, y) -> float
+        - terminal: boolean
+            Stop integrating when the event fires.
+        - direction: int
+            0 fires on any crossing, 1 only when g goes up,
+            -1 only when g goes down.
+    """
+    def __init__(self, name, g, terminal=True, direction=0):
+        self.name = name
+        self.g = g
+        self.terminal = terminal
+        self.direction = direction
+
+    def crossed(self, g0, g1):
+        # g leaving zero counts, g reaching it does not: a start at zero
+        # (apogee from rest) fires, and landing on zero fires only once
+        if self.direction >= 0 and g0 <= 0 < g1:
+            return True
+        if self.direction <= 0 and g0 >= 0 > g1:
+            return True
+        return False
+
+
+class Solution(object):
+    """
+    Result of integrate().
+
+    - t: array of accepted times
+    - y: array of states, one row per time
+    - nfev: number of calls to f
+    - events: dict of event name -> (t, y) for every event that fired
+    - event: name of the terminal event that stopped integration, or None
+    """
+    def __init__(self, t, y, nfev, events, event):
+        self.t = t
+        self.y = y
+        self.nfev = nfev
+        self.events = events
+        self.event = event
+
+
+def euler_step(f, t, y, f0, h):
+    y1 = y + h*f0
+    return y1, f(t + h, y1), None, 1
+
+
+def rk4_step(f, t, y, f0, h):
+    k2 = f(t + h/2, y + h/2*f0)
+    k3 = f(t + h/2, y + h/2*k2)
+    k4 = f(t + h, y + h*k3)
+    y1 = y + h/6*(f0 + 2*k2 + 2*k3 + k4)
+    return y1, f(t + h, y1), None, 4
+
+
+# Dormand-Prince 5(4) tableau, written out so each stage is a few array ops
+def rk45_step(f, t, y, f0, h):
+    k1 = f0
+    k2 = f(t + h/5, y + h*(k1/5))
+    k3 = f(t + 3*h/10, y + h*(3/40*k1 + 9/40*k2))
+    k4 = f(t + 4*h/5, y + h*(44/45*k1 - 56/15*k2 + 32/9*k3))
+    k5 = f(t + 8*h/9, y + h*(19372/6561*k1 - 25360/2187*k2 + 64448/6561*k3 - 212/729*k4))
+    k6 = f(t + h, y + h*(9017/3168*k1 - 355/33*k2 + 46732/5247*k3 + 49/176*k4
+                         - 5103/18656*k5))
+    y1 = y + h*(35/384*k1 + 500/1113*k3 + 125/192*k4 - 2187/6784*k5 + 11/84*k6)
+    # first same as last: f(t + h, y1) is the 7th stage and the next f0
+    k7 = f(t + h, y1)
+    err = h*(71/57600*k1 - 71/16695*k3 + 71/1920*k4 - 17253/339200*k5 + 22/525*k6
+             - 1/40*k7)
+    return y1, k7, err, 6
+
+
+METHODS = {
+    "euler": euler_step,
+    "rk4": rk4_step,
+    "rk45": rk45_step,
+}
+
+
+def register(name, step):
+    """
+    Make a new stepper available to integrate() under `name`.
+    """
+    METHODS[name] = step
+
+
+def _hermite(t0, y0, f0, t1, y1, f1, t):
+    # cubic Hermite interpolation, uses the derivatives we already have
+    h = t1 - t0
+    s = (t - t0)/h
+    h00 = 2*s**3 - 3*s**2 + 1
+    h10 = s**3 - 2*s**2 + s
+    h01 = -2*s**3 + 3*s**2
+    h11 = s**3 - s**2
+    return h00*y0 + h10*h*f0 + h01*y1 + h11*h*f1
+
+
+def _locate(event, t0, y0, f0, t1, y1, f1, tol):
+    # Illinois false position on the interpolant, so finding the event
+    # time costs no f calls and only a handful of iterations
+    a, b = t0, t1
+    ga, gb = event.g(t0, y0), event.g(t1, y1)
+    side = 0
+    for _ in range(100):
+        if b - a <= tol or ga == gb:
+            break
+        m = b - gb*(b - a)/(gb - ga)
+        gm = event.g(m, _hermite(t0, y0, f0, t1, y1, f1, m))
+        if gm == 0:
+            a = b = m
+            break
+        if (gm < 0) == (gb < 0):
+            b, gb = m, gm
+            if side == -1:
+                ga /= 2
+            side = -1
+        else:
+            a, ga = m, gm
+            if side == 1:
+                gb /= 2
+            side = 1
+        if abs(gm) <= tol*abs(gb - ga):
+            b = m
+            break
+    return b, _hermite(t0, y0, f0, t1, y1, f1, b)
+
+
+def integrate(f, t0, y0, t_end, method="rk45", h=None, rtol=1e-6, atol=1e-9,
+              events=(), max_steps=1000000):
+    """
+    Integrate dy/dt = f(t, y) from t0 to t_end.
+
+    - input:
+        - f: function(t, y) -> array
+        - t0, t_end: float
+        - y0: array
+        - method: string
+            A key of METHODS.
+        - h: float
+            Step size. Fixed-step methods use it as is, adaptive
+            methods use it as the first guess. Defaults to 1/100
+            of the interval.
+        - rtol, atol: float
+            Error tolerances for adaptive methods.
+        - events: list of Event
+
+    returns:
+        - Solution
+    """
+    step = METHODS[method]
+    t = float(t0)
+    y = np.array(y0, dtype=np.float64)
+    if h is None:
+        h = (t_end - t0)/100.0
+    f0 = f(t, y)
+    nfev = 1
+    ts = [t]
+    ys = [y]
+    fired = {}
+    stop = None
+    g_prev = [ev.g(t, y) for ev in events]
+
+    for _ in range(max_steps):
+        if t >= t_end:
+            break
+        h = min(h, t_end - t)
+        y1, f1, err, n = step(f, t, y, f0, h)
+        nfev += n
+
+        if err is not None:
+            scale = atol + rtol*np.maximum(np.abs(y), np.abs(y1))
+            norm = np.sqrt(np.mean((err/scale)**2))
+            factor = 5.0 if norm == 0 else min(5.0, max(0.2, 0.9*norm**-0.2))
+            if norm > 1.0:
+                h *= factor
+                continue
+        t1 = t + h
+
+        hit = None
+        for i, ev in enumerate(events):
+            g1 = ev.g(t1, y1)
+            if ev.crossed(g_prev[i], g1):
+                te, ye = _locate(ev, t, y, f0, t1, y1, f1, 1e-12*max(1.0, abs(t1)))
+                fired[ev.name] = (te, ye)
+                if ev.terminal and (hit is None or te < hit[0]):
+                    hit = (te, ye, ev.name)
+            g_prev[i] = g1
+        if hit is not None:
+            for name in [k for k, v in fired.items() if v[0] > hit[0]]:
+                del fired[name]
+            if hit[0] > t:
+                # the interpolant is only good enough to find the time,
+                # so take one real step to land exactly on the event
+                ye, _, _, n = step(f, t, y, f0, hit[0] - t)
+                nfev += n
+                ts.append(hit[0])
+                ys.append(ye)
+            else:
+                ye = y                  # g was zero where the last step ended
+            fired[hit[2]] = (hit[0], ye)
+            stop = hit[2]
+            break
+
+        t, y, f0 = t1, y1, f1
+        ts.append(t)
+        ys.append(y)
+        if err is not None:
+            h *= factor
+
+    return Solution(np.array(ts), np.array(ys), nfev, fired, stop)
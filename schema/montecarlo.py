@@ -0,0 +1,163 @@
+"""
+Monte Carlo dispersion runs for schema.rocket.
+
+Runs are split into fixed-size shards. Shard i always draws from the
+i-th child of SeedSequence(seed), so a run gives the same numbers no
+matter how many workers it is spread over.
+
+    python -m schema.montecarlo 100000 --workers 8 --out runs.npy
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .rocket import Rocket
+
+# Parameters that get dispersed, as a relative 1 sigma
+DISPERSED = ("mass", "exV", "exP", "nozzle")
+
+RESULT_DTYPE = np.dtype([
+    ("mass", np.float64),
+    ("exV", np.float64),
+    ("exP", np.float64),
+    ("nozzle", np.float64),
+    ("apogee", np.float64),
+    ("t_apogee", np.float64),
+])
+
+NOMINAL = {
+    "fuel": 300.0,
+    "mass": 1000.0,
+    "SA": 10.0,
+    "nozzle": 0.5,
+    "exV": 400.0,
+    "exP": 101325.0,
+}
+
+SIGMA = {
+    "mass": 0.01,
+    "exV": 0.02,
+    "exP": 0.005,
+    "nozzle": 0.01,
+}
+
+
+def _run_shard(start, count, seed, nominal, sigma, t, method, out, environment):
+    rng = np.random.default_rng(seed)
+    rows = np.empty(count, dtype=RESULT_DTYPE)
+    for name in DISPERSED:
+        rows[name] = nominal[name]*(1.0 + sigma.get(name, 0.0)*rng.standard_normal(count))
+
+    env = environment() if environment is not None else None
+    apogee = rows["apogee"]
+    t_apogee = rows["t_apogee"]
+    columns = zip(*[rows[name].tolist() for name in DISPERSED])
+    for i, (mass, exV, exP, nozzle) in enumerate(columns):
+        rocket = Rocket(nominal["fuel"], mass, nominal["SA"], nozzle, exV, exP,
+                        environment=env)
+        sol = rocket.integrate(t, method=method)
+        apogee[i] = sol.y[-1][0]
+        t_apogee[i] = sol.t[-1]
+
+    if out is not None:
+        # write straight into the shared file, only the count goes back
+        result = np.load(out, mmap_mode="r+")
+        result[start:start + count] = rows
+        result.flush()
+        del result
+        return start, count, rows["apogee"]
+    return start, count, rows
+
+
+def run(n, nominal=NOMINAL, sigma=SIGMA, shard_size=10000, workers=None, seed=0,
+        out=None, t=600.0, method="rk45", percentiles=(1, 50, 99), progress=None,
+        environment=None):
+    """
+    Fly `n` dispersed rockets and collect their apogees.
+
+    - input:
+        - n: int
+            Number of trajectories.
+        - nominal: dict
+            Rocket arguments (fuel, mass, SA, nozzle, exV, exP).
+        - sigma: dict
+            Relative 1 sigma for each of DISPERSED.
+        - shard_size: int
+            Trajectories per task. Changing it changes the random draws.
+        - workers: int
+            Processes to use. 1 runs everything in this process.
+        - seed: int
+        - out: string
+            Path of a .npy file to stream results into. The file is
+            created with RESULT_DTYPE rows and opened memory-mapped.
+            Without it results go into an in-memory array.
+        - t, method:
+            Passed on to Rocket.integrate.
+        - percentiles: tuple
+            Apogee percentiles reported to `progress`.
+        - progress: function(done, stats)
+            Called after every shard with the number of finished
+            trajectories and a dict of percentile -> apogee so far.
+        - environment: function() -> Environment
+            Factory called once per shard, e.g. trajectory.Environment.
+
+    returns:
+        - array of RESULT_DTYPE rows, memory-mapped when `out` is given.
+    """
+    n_shards = -(-n // shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    shards = [(i*shard_size, min(shard_size, n - i*shard_size), seeds[i])
+              for i in range(n_shards)]
+
+    if out is not None:
+        result = np.lib.format.open_memmap(out, mode="w+", dtype=RESULT_DTYPE, shape=(n,))
+        result.flush()
+    else:
+        result = np.empty(n, dtype=RESULT_DTYPE)
+    # apogees in completion order, so percentiles only look at finished runs
+    seen = np.empty(n)
+    done = 0
+
+    def collect(start, count, rows):
+        nonlocal done
+        if out is None:
+            result[start:start + count] = rows
+            rows = rows["apogee"]
+        seen[done:done + count] = rows
+        done += count
+        if progress is not None:
+            progress(done, dict(zip(percentiles, np.percentile(seen[:done], percentiles))))
+
+    args = (nominal, sigma, t, method, out, environment)
+    if workers == 1:
+        for start, count, shard_seed in shards:
+            collect(*_run_shard(start, count, shard_seed, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_shard, start, count, shard_seed, *args)
+                       for start, count, shard_seed in shards]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    if out is not None:
+        result.flush()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Atlas Monte Carlo dispersion runner')
+    parser.add_argument('n', type=int, help='Number of trajectories')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='.npy file to stream results into')
+    args = parser.parse_args()
+
+    def report(done, stats):
+        print("{:>9}/{} ".format(done, args.n) +
+              " ".join("p{}={:.2f}".format(q, v) for q, v in stats.items()))
+
+    run(args.n, shard_size=args.shard_size, workers=args.workers, seed=args.seed,
+        out=args.out, progress=report)
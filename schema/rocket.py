@@ -1,11 +1,22 @@
+import numpy as np
+
+from . import integrate
+
+
+SEA_LEVEL_PRESSURE = 101325.0
+
+
 class Rocket(object):
-    def __init__(self, fuel, mass, SA, nozzle, exV, exP):
+    def __init__(self, fuel, mass, SA, nozzle, exV, exP, environment=None):
         self.fuel = fuel
         self.mass = mass
         self.SA = SA
         self.nozzle = nozzle
         self.exV = exV
         self.exP = exP
+        # anything with a pressure(alt) method, e.g. trajectory.Environment.
+        # Without one the rocket always sees sea level pressure.
+        self.environment = environment
         self.velocity = 0
         self.height = 0
 
@@ -13,7 +24,7 @@ class Rocket(object):
         for x in range(inc):
             # get acc (use g0 for now)
             # no drag loss for now
-            acc = (self.calcThrust(0) - self.mass*9.80665)/self.mass
+            acc = (self.calcThrust(self.height) - self.mass*9.80665)/self.mass
             # get new mass (mass - massflow/inc)
             self.mass -= self.exV*self.nozzle*1.0/inc
             # "move" the rocket
@@ -23,12 +34,167 @@ class Rocket(object):
 
     def calcThrust(self, alt):
         mflow = self.exV*self.nozzle*1.0  # fuel density is 1.0 for now
-        # eventually get correct pressure at altitude
-        # for now use 101325
-        thrust = mflow*self.exV + self.nozzle*(self.exP - 101325.0)
+        thrust = mflow*self.exV + self.nozzle*(self.exP - self.ambient(alt))
         return thrust
 
+    def ambient(self, alt):
+        if self.environment is None:
+            return SEA_LEVEL_PRESSURE
+        return self.environment.pressure(alt)
+
+    def derivatives(self, t, y, burning=True):
+        """
+        Right hand side of the ascent ODE for state y = [height, velocity, mass].
+        """
+        height, velocity, mass = y
+        if burning:
+            mflow = self.exV*self.nozzle*1.0
+            acc = (self.calcThrust(height) - mass*9.80665)/mass
+        else:
+            mflow = 0.0
+            acc = -9.80665
+        return np.array([velocity, acc, -mflow])
+
+    def integrate(self, t, method="rk45", stop="apogee", **options):
+        """
+        Fly the rocket with one of the integrate.METHODS steppers.
+
+        Unlike calcHeight, the burn ends when the fuel is gone and
+        integration stops at the `stop` event instead of after a fixed
+        number of steps.
+
+        - input:
+            - t: float
+                Give up after this many seconds if `stop` never happens.
+            - method: string
+                "euler", "rk4", "rk45" or anything added with integrate.register.
+            - stop: string
+                "burnout" or "apogee".
+            - options:
+                Passed on to integrate.integrate (h, rtol, atol).
+
+        returns:
+            - integrate.Solution for the whole flight. Its nfev is the
+              number of thrust evaluations.
+        """
+        dry = self.mass - self.fuel
+        burnout = integrate.Event("burnout", lambda t, y: y[2] - dry, direction=-1)
+        apogee = integrate.Event("apogee", lambda t, y: y[1], direction=-1)
+
+        y0 = [self.height, self.velocity, self.mass]
+        sol = integrate.integrate(self.derivatives, 0.0, y0, t, method=method,
+                                  events=[burnout, apogee], **options)
+        if sol.event == "burnout" and stop != "burnout":
+            coast = integrate.integrate(lambda t, y: self.derivatives(t, y, burning=False),
+                                        sol.t[-1], sol.y[-1], t, method=method,
+                                        events=[apogee], **options)
+            coast.events.update(sol.events)
+            coast.t = np.concatenate([sol.t, coast.t[1:]])
+            coast.y = np.concatenate([sol.y, coast.y[1:]])
+            coast.nfev += sol.nfev
+            sol = coast
+
+        self.height, self.velocity, self.mass = sol.y[-1]
+        return sol
+
+
+class RocketBatch(object):
+    """
+    Holds N rockets as struct-of-arrays and steps them all at once.
+
+    - input:
+        - fuel, mass, SA, nozzle, exV, exP: float or array
+            Same meaning as in Rocket. Scalars are broadcast
+            against the arrays, so a sweep only has to pass
+            the columns it actually varies.
+    """
+    def __init__(self, fuel, mass, SA, nozzle, exV, exP, environment=None):
+        columns = np.broadcast_arrays(*[np.array(c, dtype=np.float64, ndmin=1)
+                                        for c in (fuel, mass, SA, nozzle, exV, exP)])
+        self.fuel, self.mass, self.SA, self.nozzle, self.exV, self.exP = [
+            np.ascontiguousarray(c) for c in columns]
+        self.environment = environment
+        self.velocity = np.zeros_like(self.mass)
+        self.height = np.zeros_like(self.mass)
+
+    @classmethod
+    def from_rockets(cls, rockets, environment=None):
+        """
+        Build a batch from a list of Rocket objects.
+        """
+        return cls(*zip(*[(r.fuel, r.mass, r.SA, r.nozzle, r.exV, r.exP)
+                          for r in rockets]), environment=environment)
+
+    def __len__(self):
+        return self.mass.shape[0]
+
+    def calcThrust(self, alt):
+        mflow = self.exV*self.nozzle*1.0  # fuel density is 1.0 for now
+        thrust = mflow*self.exV + self.nozzle*(self.exP - self.ambient(alt))
+        return thrust
+
+    def ambient(self, alt):
+        if self.environment is None:
+            return SEA_LEVEL_PRESSURE
+        return self.environment.pressure(alt)
+
+    def calcHeight(self, t, inc):
+        """
+        Vectorized Rocket.calcHeight. Returns the heights of every rocket.
+        """
+        self.history(t, inc, record=False)
+        return self.height
+
+    def history(self, t, inc, record=True):
+        """
+        Step every rocket `inc` times, the same way Rocket.calcHeight does.
+
+        - input:
+            - t: float
+                Unused, kept to mirror Rocket.calcHeight.
+            - inc: int
+                Number of steps, each one 1/inc seconds long.
+            - record: boolean
+                When False, skip the history arrays.
+
+        returns:
+            - heights: array of shape (inc + 1, N)
+            - velocities: array of shape (inc + 1, N)
+                Row 0 is the state before the first step.
+        """
+        n = len(self)
+        heights = velocities = None
+        if record:
+            heights = np.empty((inc + 1, n))
+            velocities = np.empty((inc + 1, n))
+            heights[0] = self.height
+            velocities[0] = self.velocity
+
+        # mass flow never changes, and without an environment neither does thrust
+        thrust = self.calcThrust(self.height)
+        dm = self.exV*self.nozzle*1.0/inc
+        acc = np.empty(n)
+        tmp = np.empty(n)
+        for x in range(inc):
+            if self.environment is not None:
+                thrust = self.calcThrust(self.height)
+            # same operation order as Rocket.calcHeight so results match
+            np.multiply(self.mass, 9.80665, out=tmp)
+            np.subtract(thrust, tmp, out=acc)
+            np.divide(acc, self.mass, out=acc)
+            np.subtract(self.mass, dm, out=self.mass)
+            np.divide(acc, inc, out=acc)
+            np.add(self.velocity, acc, out=self.velocity)
+            np.divide(self.velocity, inc, out=tmp)
+            np.add(self.height, tmp, out=self.height)
+            if record:
+                heights[x + 1] = self.height
+                velocities[x + 1] = self.velocity
+        return heights, velocities
+
 
-rocket1 = Rocket(75.0, 1000.0, 10.0, 1.0, 400.0, 101325.0)
+if __name__ == "__main__":
+    # python -m schema.rocket
+    rocket1 = Rocket(75.0, 1000.0, 10.0, 1.0, 400.0, 101325.0)
 
-print(rocket1.calcHeight(2, 120))
+    print(rocket1.calcHeight(2, 120))
@@ -0,0 +1,61 @@
+"""
+Event detection at the edges: g starting at zero, and g landing on it.
+
+Run with pytest from the repository root:
+
+    python -m pytest schema/spec
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from schema import integrate
+
+G = 9.81
+
+
+def _ballistic(t, y):
+    return np.array([y[1], -G])
+
+
+def _apogee():
+    return integrate.Event("apogee", lambda t, y: y[1], direction=-1)
+
+
+def test_apogee_from_rest():
+    for method in ("euler", "rk4", "rk45"):
+        solution = integrate.integrate(_ballistic, 0.0, [100.0, 0.0], 10.0, method=method,
+                                       events=[_apogee()])
+        assert solution.event == "apogee"
+        assert solution.events["apogee"][0] == 0.0
+        np.testing.assert_array_equal(solution.t, [0.0])
+        np.testing.assert_array_equal(solution.y[-1], [100.0, 0.0])
+
+
+def test_event_landing_on_zero_fires_once():
+    # steps of 1/4 s land exactly on v = 0 at t = 1, everything is a power of 2
+    counted = []
+
+    def g(t, y):
+        counted.append(t)
+        return y[1]
+    ground = integrate.Event("ground", lambda t, y: y[0], direction=-1)
+    apogee = integrate.Event("apogee", g, terminal=False, direction=-1)
+    solution = integrate.integrate(lambda t, y: np.array([y[1], -8.0]), 0.0, [0.0, 8.0], 10.0,
+                                   method="rk4", h=0.25, events=[apogee, ground])
+    assert 1.0 in counted
+    assert solution.events["apogee"][0] == 1.0
+    np.testing.assert_array_equal(solution.events["apogee"][1], [4.0, 0.0])
+    assert solution.event == "ground"
+    assert abs(solution.t[-1] - 2.0) < 1e-9
+
+
+def test_rising_from_zero():
+    up = integrate.Event("up", lambda t, y: y[1], direction=1)
+    solution = integrate.integrate(lambda t, y: np.array([y[1], G]), 0.0, [0.0, 0.0], 1.0,
+                                   method="rk4", events=[up])
+    assert solution.event == "up" and solution.t[-1] == 0.0
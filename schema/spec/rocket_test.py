@@ -0,0 +1,67 @@
+"""
+RocketBatch against the scalar Rocket, and the adaptive integrator
+against a fine fixed step.
+
+Run with pytest from the repository root:
+
+    python -m pytest schema/spec
+"""
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from schema import rocket
+
+# trajectory/__init__.py pulls in modules that are not written yet, load the file itself
+_spec = importlib.util.spec_from_file_location(
+    "environment", os.path.join(ROOT, "shared", "trajectory", "trajectory", "environment.py"))
+environment = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(environment)
+
+# fuel, mass, SA, nozzle, exV, exP
+ROCKETS = (
+    (75.0, 1000.0, 10.0, 1.0, 400.0, 101325.0),
+    (150.0, 1200.0, 12.0, 0.5, 600.0, 90000.0),
+    (40.0, 800.0, 8.0, 0.8, 350.0, 120000.0),
+)
+
+
+def _compare(env):
+    batch = rocket.RocketBatch(*zip(*ROCKETS), environment=env)
+    heights, velocities = batch.history(2, 120)
+    scalar = [rocket.Rocket(*params, environment=env) for params in ROCKETS]
+    expected = [r.calcHeight(2, 120) for r in scalar]
+    # same operation order, so the results are identical, not just close
+    assert heights.shape == velocities.shape == (121, len(ROCKETS))
+    assert np.array_equal(heights[0], np.zeros(len(ROCKETS)))
+    assert np.array_equal(heights[-1], expected)
+    assert np.array_equal(velocities[-1], [r.velocity for r in scalar])
+    assert np.array_equal(batch.mass, [r.mass for r in scalar])
+
+
+def test_batch_matches_calcHeight():
+    _compare(None)
+
+
+def test_batch_matches_calcHeight_with_environment():
+    _compare(environment.Environment())
+
+
+def test_batch_calcHeight():
+    batch = rocket.RocketBatch.from_rockets([rocket.Rocket(*params) for params in ROCKETS])
+    expected = [rocket.Rocket(*params).calcHeight(2, 120) for params in ROCKETS]
+    assert np.array_equal(batch.calcHeight(2, 120), expected)
+
+
+def test_rk45_apogee_matches_rk4():
+    fine = rocket.Rocket(*ROCKETS[1]).integrate(100, method="rk4", h=1e-3)
+    adaptive = rocket.Rocket(*ROCKETS[1]).integrate(100, method="rk45")
+    assert fine.event == adaptive.event == "apogee"
+    assert abs(adaptive.y[-1][0] - fine.y[-1][0]) < 1e-4
+    assert abs(adaptive.t[-1] - fine.t[-1]) < 1e-6
+    assert adaptive.nfev*10 < fine.nfev
@@ -2,8 +2,7 @@
 import turtle
 import random
 
-rohan = turtle.Pen()
-num = random.randint(1,100)
+rohan = None
 colorlist = ["red","orange","yellow","green","blue","purple"]
 
 def forward(num):
@@ -23,14 +22,20 @@ def backward(num,colorlist):
     rohan.backward(num)
     rohan.pencolor(random.choice(colorlist))
 
-#create a screen
-screen = turtle.Screen()
-#tell screen to listen to the keystrokes/clicks
-screen.listen()
-#tie the keys to functions
-screen.onkey(forward,'Up')
-screen.onkey(backward,'Down')
-screen.onkey(right,'Right')
-screen.onkey(left,'Left')
-
-del rohan, num, colorlist, screen
\ No newline at end of file
+def start():
+    """
+    Open the turtle screen and bind the arrow keys.
+    Needs a display, so it is not done at import.
+    """
+    global rohan
+    rohan = turtle.Pen()
+    #create a screen
+    screen = turtle.Screen()
+    #tell screen to listen to the keystrokes/clicks
+    screen.listen()
+    #tie the keys to functions
+    screen.onkey(forward,'Up')
+    screen.onkey(backward,'Down')
+    screen.onkey(right,'Right')
+    screen.onkey(left,'Left')
+    return screen
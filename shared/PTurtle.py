@@ -43,4 +43,11 @@ class Turtle:
     def up(self,l):
         self.hi.forward(l)
 
-turtle = Turtle()
\ No newline at end of file
+turtle = None
+
+def get_turtle():
+    # opens the turtle window, so only on first use
+    global turtle
+    if turtle is None:
+        turtle = Turtle()
+    return turtle
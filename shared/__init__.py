@@ -1,7 +1,40 @@
 # for python3 purposes
-from . import skyforce
-from . import PTurtle
-from . import medical
-from . import Gui
-from . import components
-from . import error
\ No newline at end of file
+"""
+Shared helpers for Atlas.
+
+Submodules are imported the first time they are used, so `import shared`
+stays cheap and does not need a display or TensorFlow:
+
+    from shared import components      # imports shared/components.py only
+"""
+import importlib
+
+# public name -> submodule
+_SUBMODULES = {
+    'skyforce': '.skyforce',
+    'PTurtle': '.PTurtle',
+    'medical': '.medical',
+    'Gui': '.Gui',
+    'components': '.components',
+    'error': '.handlers.error',
+    'backend': '.backend',
+    'manifest': '.manifest',
+    'serving': '.serving',
+    'dataset': '.dataset',
+    'telemetry': '.telemetry',
+    'pyramid': '.pyramid',
+}
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    module = importlib.import_module(_SUBMODULES[name], __name__)
+    globals()[name] = module            # later lookups skip __getattr__
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
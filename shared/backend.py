@@ -0,0 +1,76 @@
+"""
+Lazy ML backend.
+
+TensorFlow and Keras take seconds to import, so modules get them through
+proxies that import the real module on first attribute access:
+
+    from shared.backend import tf
+    model = tf.keras.Sequential([...])   # tensorflow is imported here
+
+Small random tensors have a NumPy path, see uniform().
+"""
+import importlib
+import importlib.util
+
+import numpy as np
+
+
+class LazyModule(object):
+    """
+    Stand-in for a module that is imported the first time it is used.
+
+    - input:
+        - name: string
+            Module to import, e.g. 'tensorflow'
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.load(), attr, value)
+
+    def __dir__(self):
+        return dir(self.load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return "<lazy module {!r} ({})>".format(self._name, state)
+
+
+tf = LazyModule('tensorflow')
+keras = LazyModule('keras')
+
+
+def available(name='tensorflow'):
+    """
+    True if `name` can be imported. Does not import it.
+    """
+    return importlib.util.find_spec(name) is not None
+
+
+def uniform(shape, minval=0.0, maxval=1.0, dtype=np.float32, seed=None):
+    """
+    NumPy version of tf.random.uniform, for tensors too small to be
+    worth loading TensorFlow for.
+
+    - input:
+        - shape: tuple
+        - minval, maxval: float
+        - dtype: numpy dtype
+        - seed: int
+    """
+    rng = np.random.default_rng(seed)
+    return rng.uniform(minval, maxval, size=shape).astype(dtype, copy=False)
@@ -0,0 +1,192 @@
+"""
+Out-of-core training data for shared.medical.
+
+A CSV is read in chunks and written as float32 .npy shards next to a
+small manifest.json:
+
+    <cache>/manifest.json     columns, rows per shard, stamp of the CSV
+    <cache>/shard-00000.npy   chunk_rows x len(columns)
+
+Training reads the shards memory-mapped through a shuffle buffer and a
+prefetch thread, so memory stays at one shard plus the buffer however
+long the crew logs get. The shards are rebuilt only when the CSV changes.
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def build_shards(csv_path, cache_dir, chunk_rows=65536):
+    """
+    Convert `csv_path` to shards in `cache_dir` unless they are current.
+
+    returns:
+        - the manifest dict
+    """
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    stamp = _stamp(csv_path)
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        if manifest.get('version') == CACHE_VERSION and manifest['stamp'] == stamp:
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+
+    import pandas as pd                 # slow to import, only needed to build
+    os.makedirs(cache_dir, exist_ok=True)
+    shards = []
+    columns = None
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_rows)):
+        if columns is None:
+            columns = [str(c) for c in chunk.columns]
+        name = 'shard-{:05d}.npy'.format(i)
+        np.save(os.path.join(cache_dir, name),
+                chunk.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32))
+        shards.append({'file': name, 'rows': len(chunk)})
+    manifest = {
+        'version': CACHE_VERSION,
+        'stamp': stamp,
+        'columns': columns or [],
+        'shards': shards,
+    }
+    tmp = manifest_path + '.tmp'
+    with open(tmp, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+class ShardDataset(object):
+    """
+    Batches of (features, target) from a shard cache.
+
+    - input:
+        - csv_path: string
+        - cache_dir: string
+            Defaults to `<csv_path>.shards`.
+        - target: string
+            Column to predict, defaults to the last one.
+        - features: list of string
+            Defaults to every other column.
+        - chunk_rows: int
+            Rows per shard.
+    """
+    def __init__(self, csv_path, cache_dir=None, target=None, features=None, chunk_rows=65536):
+        self.cache_dir = cache_dir or csv_path + '.shards'
+        self.manifest = build_shards(csv_path, self.cache_dir, chunk_rows)
+        columns = self.manifest['columns']
+        self.target = target or columns[-1]
+        self.features = list(features or [c for c in columns if c != self.target])
+        self._x = np.array([columns.index(c) for c in self.features])
+        self._y = columns.index(self.target)
+
+    def __len__(self):
+        return sum(shard['rows'] for shard in self.manifest['shards'])
+
+    def steps(self, batch_size):
+        return -(-len(self) // batch_size)
+
+    def shard(self, i):
+        return np.load(os.path.join(self.cache_dir, self.manifest['shards'][i]['file']),
+                       mmap_mode='r')
+
+    def rows(self, shuffle_buffer=10000, seed=None):
+        """
+        Blocks of rows in shuffled order, shard by shard.
+
+        Rows are mixed within a buffer of `shuffle_buffer` rows carried
+        across shards, and the shards themselves are visited in random
+        order. shuffle_buffer=0 keeps file order.
+        """
+        rng = np.random.default_rng(seed)
+        order = np.arange(len(self.manifest['shards']))
+        if shuffle_buffer:
+            rng.shuffle(order)
+        carry = np.empty((0, len(self.manifest['columns'])), dtype=np.float32)
+        for i in order:
+            block = np.concatenate([carry, self.shard(i)])
+            if not shuffle_buffer:
+                yield block
+                carry = block[:0]
+                continue
+            rng.shuffle(block)
+            carry = block[:shuffle_buffer]
+            if len(block) > shuffle_buffer:
+                yield block[shuffle_buffer:]
+        if len(carry):
+            yield carry
+
+    def batches(self, batch_size=32, shuffle_buffer=10000, seed=None, epochs=1, prefetch=4,
+                drop_remainder=False):
+        """
+        Generator of (features, target) batches, prepared on a
+        background thread `prefetch` batches ahead. epochs=None repeats
+        forever, as keras' fit(steps_per_epoch=...) expects.
+        """
+        q = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                epoch = 0
+                while epochs is None or epoch < epochs:
+                    pending = None
+                    for block in self.rows(shuffle_buffer, None if seed is None else seed + epoch):
+                        if pending is not None:
+                            block = np.concatenate([pending, block])
+                        n = len(block) - len(block) % batch_size
+                        for start in range(0, n, batch_size):
+                            rows = block[start:start + batch_size]
+                            q.put((rows[:, self._x], rows[:, self._y]))
+                            if stop.is_set():
+                                return
+                        pending = block[n:] if n < len(block) else None
+                    if pending is not None and not drop_remainder:
+                        q.put((pending[:, self._x], pending[:, self._y]))
+                    epoch += 1
+                q.put(done)
+            except Exception as err:
+                q.put(err)
+
+        worker = threading.Thread(target=produce, name='dataset-prefetch', daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            while worker.is_alive():
+                # unblock the producer so it can see stop
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    worker.join(0.01)
+
+    def to_tf(self, batch_size=32, shuffle_buffer=10000, seed=None):
+        """
+        The same batches as a repeating tf.data.Dataset.
+        """
+        from .backend import tf
+        n = len(self.features)
+        return tf.data.Dataset.from_generator(
+            lambda: self.batches(batch_size, shuffle_buffer, seed, epochs=None),
+            output_signature=(tf.TensorSpec((None, n), tf.float32),
+                              tf.TensorSpec((None,), tf.float32)),
+        ).prefetch(tf.data.AUTOTUNE)
@@ -1,4 +1,4 @@
-def get_err(dev_mode = True, err):
+def get_err(err, dev_mode = True):
     if dev_mode != False:
         if err == "EnvironmentError":
             status_code = 100
@@ -6,7 +6,6 @@ def get_err(dev_mode = True, err):
             status_code = 200
         elif err == "SyntaxError":
             status_code = 300
-        elif err == ""
         else:
             status_code = 900
 
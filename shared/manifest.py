@@ -0,0 +1,116 @@
+"""
+Service worker manifests, indexed by short_name.
+
+A manifest is column oriented JSON, the layout pandas.read_json reads:
+
+    {"name": "atlas",
+     "short_name": {"0": "atlas_stage1", "1": "atlas_stage2"},
+     "description": {"0": "...", "1": "..."}}
+
+ManifestStore turns it into one dict per row keyed by short_name and
+keeps that index pickled next to the source as `<file>.cache.pickle`,
+so a restart with an unchanged manifest is a single unpickle. The file
+is checked for changes at most every `check_interval` seconds.
+"""
+import json
+import os
+import pickle
+import time
+
+CACHE_VERSION = 1
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def index_rows(manifest, key='short_name'):
+    """
+    Column oriented manifest -> {key value: row dict}.
+
+    Columns that are plain values (like "name") are copied into every row.
+    """
+    columns = {k: v for k, v in manifest.items() if isinstance(v, dict)}
+    shared = {k: v for k, v in manifest.items() if not isinstance(v, dict)}
+    if key not in columns:
+        raise ValueError("Manifest has no {!r} column".format(key))
+    index = {}
+    for row in columns[key]:
+        entry = dict(shared)
+        for column, values in columns.items():
+            entry[column] = values.get(row)
+        index[entry[key]] = entry
+    return index
+
+
+class ManifestStore(object):
+    """
+    O(1) lookups into a service worker manifest.
+
+    - input:
+        - path: string
+            The manifest JSON.
+        - cache: boolean
+            Use (and write) the pickled sidecar.
+        - check_interval: float
+            Seconds between checks of the file for changes, 0 checks on
+            every lookup.
+    """
+    def __init__(self, path, cache=True, check_interval=1.0):
+        self.path = path
+        self.cache = cache
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._index = None
+        self._stamp = None
+        self._checked = 0.0
+
+    @property
+    def index(self):
+        now = time.monotonic()
+        if self._index is None or now - self._checked >= self.check_interval:
+            self._checked = now
+            stamp = _stamp(self.path)
+            if stamp != self._stamp:
+                self._load(stamp)
+        return self._index
+
+    def _load(self, stamp):
+        sidecar = self.path + '.cache.pickle'
+        if self.cache:
+            try:
+                with open(sidecar, 'rb') as file:
+                    version, cached_stamp, index = pickle.load(file)
+                if version == CACHE_VERSION and tuple(cached_stamp) == stamp:
+                    self._index, self._stamp = index, stamp
+                    return
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                pass
+        with open(self.path) as file:
+            index = index_rows(json.load(file))
+        self._index, self._stamp = index, stamp
+        self.reloads += 1
+        if self.cache:
+            tmp = sidecar + '.tmp'
+            with open(tmp, 'wb') as file:
+                pickle.dump((CACHE_VERSION, stamp, index), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, sidecar)
+
+    def __getitem__(self, short_name):
+        return self.index[short_name]
+
+    def __contains__(self, short_name):
+        return short_name in self.index
+
+    def __iter__(self):
+        return iter(self.index.values())
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, short_name, default=None):
+        return self.index.get(short_name, default)
+
+    def names(self):
+        return list(self.index)
@@ -1,24 +1,37 @@
 from . import skyforce
-import tensorflow as tf
+from . import serving
+from . import dataset
+from .backend import tf, keras         # loaded on first use
 import os
+import threading
 import urllib
-import pandas as pd
-from keras.callbacks import EarlyStopping
 
 rows_to_show = 10
+FEATURES = ("severely injured",) # one reading, in the order the model takes it
+DATA_FILE = "medical.csv" # crew biometric log, one row per reading
+BATCH_SIZE = 32
 
 def fetch_data():
     pass
 
 def load_data(atlas_folder):
+    import pandas as pd                 # slow to import, only needed here
     data_path = os.path.join(atlas_folder, "")
     return pd.read_csv(data_path)
 
+def load_dataset(atlas_folder, **options):
+    """
+    The crew log as a streamed, sharded dataset. Unlike load_data it
+    never holds the whole file in memory.
+    """
+    return dataset.ShardDataset(os.path.join(atlas_folder, DATA_FILE), features=FEATURES, **options)
+
 def create_model():
     model = tf.keras.Sequential([
-        tf.keras.Dense(1), # input layer
-        tf.keras.Dense(10, activation='relu'), # hidden layer
-        tf.keras.Dense(2) # output layer
+        tf.keras.Input(shape=(len(FEATURES),)),
+        tf.keras.layers.Dense(1), # input layer
+        tf.keras.layers.Dense(10, activation='relu'), # hidden layer
+        tf.keras.layers.Dense(2) # output layer
     ])
     return model
 
@@ -27,17 +40,61 @@ def compile_model(model, eta):
     sgd = tf.keras.optimizers.SGD(learning_rate=eta, name='SGD')
     model.compile(optimizer=sgd, loss=mae)
     return model
+
+def build_model():
+    """
+    The served model, built and compiled once.
+    """
+    return compile_model(create_model(), 0.01)
+
+def server():
+    return serving.get_server("medical", build=build_model, input_shape=(len(FEATURES),))
     
-def __init__():
-    data = load_data()
-    X = data[:20] # @TODO: get real data
-    y = data[20:] # @TODO: get real data
-    print("First 10 rows of data:\n".format(data.head(rows_to_show)))
-    create_model()
-    compile_model(create_model(), 0.01)
-    early_stopping_monitor = EarlyStopping(patience=5)
-    create_model().model.fit(X, y, epochs=1000, validation_split=0.3, callbacks=[early_stopping_monitor])
+def train(atlas_folder="."):
+    """
+    Train a fresh model on the crew log and swap it into the server.
+    The served model keeps answering post() while this runs.
+    """
+    data = load_dataset(atlas_folder) # @TODO: get real data
+    print("First 10 rows of data:\n{}".format(next(data.rows(shuffle_buffer=0))[:rows_to_show]))
+    model = build_model()
+    # streamed batches have no validation split, stop on the training loss
+    early_stopping_monitor = keras.callbacks.EarlyStopping(monitor='loss', patience=5)
+    model.fit(data.to_tf(BATCH_SIZE), steps_per_epoch=data.steps(BATCH_SIZE), epochs=1000,
+              callbacks=[early_stopping_monitor])
+    server().swap(model)
+    return model
+
+_training = None
+_training_lock = threading.Lock()
+
+def __init__(atlas_folder="."):
+    """
+    Start the server and, once, a background training run. Returns
+    right away, so it is safe to call from a request.
+    """
+    global _training
+    server()
+    with _training_lock:
+        if _training is None:
+            _training = threading.Thread(target=train, args=(atlas_folder,), name='medical-train',
+                                         daemon=True)
+            _training.start()
     # @TODO: Wait for post() method to be called
+    return _training
+
+def post(reading=None):
+    """
+    Queue a reading for the medical model. Readings from every
+    astronaut are predicted together in small batches.
+    - input:
+        - reading: dict of FEATURES -> number
+    - output:
+        - Future with the prediction, None without a reading
+    """
+    if reading is None:
+        return None
+    return server().submit([float(reading.get(name, 0.0)) for name in FEATURES])
 
-def post():
-    print("Post method called!")
\ No newline at end of file
+def metrics():
+    return serving.metrics()
\ No newline at end of file
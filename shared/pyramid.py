@@ -0,0 +1,367 @@
+"""
+Multi-resolution min/max/mean pyramids over telemetry logs.
+
+Level 1 summarizes every `base` samples of a channel, each level above
+it `factor` buckets of the level below. A bucket stores its first and
+last time, min, max, mean and sample count, one flat float64 file per
+column so a level can be memory-mapped and binary searched:
+
+    logs/pyramids/meta.json
+    logs/pyramids/<channel id>/L1.t0  L1.t1  L1.min  L1.max  L1.mean  L1.count
+    logs/pyramids/<channel id>/L2.t0  ...
+
+TelemetryLog extends them with every batch it writes, so they are
+current as data arrives. meta.json records how many log records they
+cover, the bucket count of every level and the partial buckets still
+open, and on startup build() catches up with whatever was logged
+without them. Queries pick the coarsest level that still gives about
+the requested number of points, so drawing an hour of data costs the
+same as a minute:
+
+    python -m shared.pyramid build
+    python -m shared.pyramid query stage2.pressure --points 1000
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+from . import telemetry
+
+PYRAMID_DIR = os.path.join(telemetry.LOG_DIR, 'pyramids')
+COLUMNS = ('t0', 't1', 'min', 'max', 'mean', 'count')
+CACHE_VERSION = 2
+
+
+def reduce(block, n):
+    """
+    Merge every `n` consecutive buckets of `block` (dict of columns,
+    length a multiple of n, or shorter for the final partial bucket).
+    """
+    if len(block['t0']) % n:
+        n = len(block['t0'])            # the partial bucket at the end
+    shape = (-1, n)
+    count = block['count'].reshape(shape).sum(axis=1)
+    return {
+        't0': block['t0'][::n].copy(),
+        't1': block['t1'][n - 1::n].copy(),
+        'min': block['min'].reshape(shape).min(axis=1),
+        'max': block['max'].reshape(shape).max(axis=1),
+        'mean': (block['mean']*block['count']).reshape(shape).sum(axis=1)/count,
+        'count': count,
+    }
+
+
+def samples(times, values):
+    """
+    Raw samples as one-sample buckets.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    return {'t0': times, 't1': times, 'min': values, 'max': values, 'mean': values,
+            'count': np.ones(len(times))}
+
+
+class LevelWriter(object):
+    """
+    Appends buckets to one level, carrying the remainder that does not
+    fill a bucket yet, and feeds its output to the next level.
+
+    - input:
+        - length: int
+            Buckets already in the files, anything past them is dropped.
+        - carry: dict of lists
+            Partial bucket left open by the last run.
+    """
+    def __init__(self, directory, level, n, parent=None, length=0, carry=None):
+        self.n = n
+        self.length = length
+        self.parent = parent
+        self.files = {}
+        for c in COLUMNS:
+            file = open(os.path.join(directory, 'L{}.{}'.format(level, c)), 'ab')
+            file.truncate(length*8)
+            self.files[c] = file
+        self.carry = ({c: np.asarray(carry[c], dtype=np.float64) for c in COLUMNS}
+                      if carry else None)
+
+    def push(self, block):
+        if self.carry is not None:
+            block = {c: np.concatenate([self.carry[c], block[c]]) for c in COLUMNS}
+        full = len(block['t0']) - len(block['t0']) % self.n
+        self.carry = {c: block[c][full:] for c in COLUMNS} if full < len(block['t0']) else None
+        if full:
+            self._emit(reduce({c: block[c][:full] for c in COLUMNS}, self.n))
+
+    def flush(self):
+        for file in self.files.values():
+            file.flush()
+        if self.parent is not None:
+            self.parent.flush()
+
+    def state(self):
+        """
+        (lengths, carries) of this level and the ones above it.
+        """
+        lengths, carries = [], []
+        writer = self
+        while writer is not None:
+            lengths.append(writer.length)
+            carries.append({c: writer.carry[c].tolist() for c in COLUMNS}
+                           if writer.carry is not None else None)
+            writer = writer.parent
+        return lengths, carries
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        if self.parent is not None:
+            self.parent.close()
+
+    def _emit(self, buckets):
+        for c in COLUMNS:
+            self.files[c].write(buckets[c].astype(np.float64).tobytes())
+        self.length += len(buckets['t0'])
+        if self.parent is not None:
+            self.parent.push(buckets)
+
+
+class PyramidWriter(object):
+    """
+    Extends the pyramids of every channel with batches of log records.
+
+    Opening it picks up where meta.json left off; when the files do not
+    match it (other parameters, a crash between a write and its meta)
+    the pyramids start over empty and build() refills them from the logs.
+    """
+    def __init__(self, out_dir=PYRAMID_DIR, base=16, factor=4, levels=8):
+        self.out_dir = out_dir
+        self.base = base
+        self.factor = factor
+        self.levels = levels
+        self.writers = {}
+        meta = self._load()
+        if meta is None:
+            self.reset()
+            return
+        self.meta = meta
+        self.records = meta['records']
+        for cid, lengths in meta['channels'].items():
+            self.writers[int(cid)] = self._chain(int(cid), lengths, meta['carry'][cid])
+
+    def _meta_path(self):
+        return os.path.join(self.out_dir, 'meta.json')
+
+    def _load(self):
+        try:
+            with open(self._meta_path()) as file:
+                meta = json.load(file)
+            if meta.get('version') != CACHE_VERSION or meta['base'] != self.base or \
+                    meta['factor'] != self.factor or len(meta['sizes']) != self.levels:
+                return None
+            for cid, lengths in meta['channels'].items():
+                for level, length in enumerate(lengths, 1):
+                    for c in COLUMNS:
+                        path = os.path.join(self.out_dir, cid, 'L{}.{}'.format(level, c))
+                        if os.path.getsize(path) < length*8:
+                            return None
+            return meta
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def reset(self):
+        self.close()
+        self.writers = {}
+        self.records = 0
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+        os.makedirs(self.out_dir)
+        self._save()
+
+    def _chain(self, cid, lengths=None, carries=None):
+        directory = os.path.join(self.out_dir, str(cid))
+        os.makedirs(directory, exist_ok=True)
+        lengths = lengths or [0]*self.levels
+        carries = carries or [None]*self.levels
+        top = None
+        for level in range(self.levels, 0, -1):
+            top = LevelWriter(directory, level, self.base if level == 1 else self.factor, top,
+                              lengths[level - 1], carries[level - 1])
+        return top
+
+    def push(self, records):
+        """
+        Add log records (telemetry.RECORD, in time order) and save meta.json.
+        """
+        if not len(records):
+            return
+        channels = records['channel']
+        for cid in np.unique(channels):
+            rows = records[channels == cid]
+            cid = int(cid)
+            if cid not in self.writers:
+                self.writers[cid] = self._chain(cid)
+            self.writers[cid].push(samples(rows['time'], rows['value']))
+        self.records += len(records)
+        for writer in self.writers.values():
+            writer.flush()
+        self._save()
+
+    def _save(self):
+        meta = {'version': CACHE_VERSION, 'records': self.records, 'base': self.base,
+                'factor': self.factor, 'sizes': [self.base*self.factor**k for k in range(self.levels)],
+                'channels': {}, 'carry': {}}
+        for cid, writer in self.writers.items():
+            meta['channels'][str(cid)], meta['carry'][str(cid)] = writer.state()
+        tmp = self._meta_path() + '.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp, self._meta_path())
+        self.meta = meta
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+def build(log_dir=telemetry.LOG_DIR, out_dir=PYRAMID_DIR, base=16, factor=4, levels=8,
+          chunk=1 << 20):
+    """
+    Open the pyramids in `out_dir` and add the records of `log_dir` they
+    do not cover yet, streaming each log file in chunks of `chunk` records.
+
+    returns:
+        - PyramidWriter, caught up with the logs
+    """
+    writer = PyramidWriter(out_dir, base, factor, levels)
+    reader = telemetry.LogReader(log_dir)
+    if writer.records > sum(len(log) for log in reader.files):
+        writer.reset()                  # not these logs
+    skip = writer.records
+    for log in reader.files:
+        if skip >= len(log):
+            skip -= len(log)
+            continue
+        for start in range(skip, len(log), chunk):
+            writer.push(np.asarray(log.records[start:start + chunk]))
+        skip = 0
+    return writer
+
+
+class Pyramids(object):
+    """
+    Range queries at a requested resolution. meta.json is re-read when
+    the writer has replaced it, so queries see data as it is logged.
+    """
+    def __init__(self, out_dir=PYRAMID_DIR, log_dir=telemetry.LOG_DIR):
+        self.out_dir = out_dir
+        self.log_dir = log_dir
+        self.meta = None
+        self.names = {}
+        self._stamp = None
+        self._levels = {}
+        self.refresh()
+
+    def refresh(self):
+        try:
+            st = os.stat(os.path.join(self.out_dir, 'meta.json'))
+            stamp = (st.st_ino, st.st_mtime_ns)     # replaced, not rewritten in place
+        except OSError:
+            stamp = None                # nothing logged yet, queries read the raw log
+        if stamp == self._stamp and stamp is not None:
+            return
+        self._stamp = stamp
+        self.meta = None
+        if stamp is not None:
+            try:
+                with open(os.path.join(self.out_dir, 'meta.json')) as file:
+                    self.meta = json.load(file)
+            except (OSError, ValueError):
+                self._stamp = None
+        self.names = telemetry._load_channels(self.log_dir)
+        self._levels = {}
+
+    def level(self, cid, k):
+        key = (cid, k)
+        if key not in self._levels:
+            length = self.meta['channels'][str(cid)][k - 1]
+            directory = os.path.join(self.out_dir, str(cid))
+            self._levels[key] = {
+                c: (np.memmap(os.path.join(directory, 'L{}.{}'.format(k, c)), dtype=np.float64,
+                              mode='r', shape=(length,)) if length else np.zeros(0))
+                for c in COLUMNS}
+        return self._levels[key]
+
+    def tail(self, cid, k):
+        """
+        The newest data, not rolled up into level k yet, as one bucket:
+        the partial buckets still open at level k and every level below.
+        """
+        carries = [carry for carry in self.meta['carry'][str(cid)][:k] if carry is not None]
+        if not carries:
+            return None
+        # level k holds the oldest of it, level 1 the raw samples since
+        block = {c: np.concatenate([np.asarray(carry[c], dtype=np.float64)
+                                    for carry in reversed(carries)]) for c in COLUMNS}
+        return reduce(block, len(block['t0']))
+
+    def query(self, channel, t0=-np.inf, t1=np.inf, points=1000):
+        """
+        About `points` buckets of `channel` between t0 and t1. Raises
+        KeyError for a channel that was never logged. The data not yet in
+        a full bucket of the level used comes last, as one partial bucket.
+
+        returns:
+            - dict with t0, t1, min, max, mean and count arrays, plus the
+              level used (0 is the raw samples)
+        """
+        self.refresh()
+        cid = self.names[channel] if isinstance(channel, str) else channel
+        n = 0.0
+        if self.meta is not None and str(cid) in self.meta['channels']:
+            # level 1 counts the samples in range without touching them
+            first = self.level(cid, 1)
+            i0, i1 = np.searchsorted(first['t1'], t0), np.searchsorted(first['t0'], t1)
+            n = float(first['count'][i0:i1].sum())
+        if n <= points:
+            times, values = telemetry.LogReader(self.log_dir).query(cid, t0, t1)
+            result = samples(times, values)
+            result['level'] = 0
+            return result
+        sizes = self.meta['sizes']
+        k = next((k for k, size in enumerate(sizes, 1) if n/size <= points), len(sizes))
+        buckets = self.level(cid, k)
+        # buckets that overlap [t0, t1)
+        i0 = np.searchsorted(buckets['t1'], t0)
+        i1 = np.searchsorted(buckets['t0'], t1)
+        result = {c: np.asarray(buckets[c][i0:i1]) for c in COLUMNS}
+        tail = self.tail(cid, k)
+        if tail is not None and tail['t1'][0] >= t0 and tail['t0'][0] < t1:
+            result = {c: np.concatenate([result[c], tail[c]]) for c in COLUMNS}
+        result['level'] = k
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Telemetry pyramids')
+    sub = parser.add_subparsers(dest='command')
+    b = sub.add_parser('build')
+    b.add_argument('--logs', default=telemetry.LOG_DIR)
+    b.add_argument('--out', default=PYRAMID_DIR)
+    q = sub.add_parser('query')
+    q.add_argument('channel')
+    q.add_argument('--t0', type=float, default=-np.inf)
+    q.add_argument('--t1', type=float, default=np.inf)
+    q.add_argument('--points', type=int, default=1000)
+    q.add_argument('--out', default=PYRAMID_DIR)
+    args = parser.parse_args()
+    if args.command == 'build':
+        writer = build(args.logs, args.out)
+        writer.close()
+        print(json.dumps(writer.meta['channels']))
+    elif args.command == 'query':
+        result = Pyramids(args.out).query(args.channel, args.t0, args.t1, args.points)
+        print("level {}: {} points".format(result['level'], len(result['t0'])))
+    else:
+        parser.print_help()
@@ -0,0 +1,210 @@
+"""
+Micro-batched model serving.
+
+Each model is built and warmed once. Readings from many callers are
+queued, grouped into batches of up to `max_batch` that wait at most
+`max_latency` seconds for company, and run through one batched predict:
+
+    server = serving.get_server('medical', build=medical.build_model, input_shape=(1,))
+    prediction = server.predict([1.0])        # blocks until its batch ran
+
+metrics() reports batch sizes and request latency for the dashboard.
+"""
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def _predictor(model):
+    # keras models batch best through predict_on_batch, anything else is called
+    if hasattr(model, 'predict_on_batch'):
+        return model.predict_on_batch
+    return model
+
+
+class ModelServer(object):
+    """
+    One model behind a batching queue.
+
+    - input:
+        - build: function() -> model
+            Called once, on the serving thread.
+        - input_shape: tuple
+            Shape of one reading, used to warm the model up.
+        - max_batch: int
+        - max_latency: float
+            Seconds the first reading of a batch may wait for more.
+        - window: int
+            Number of recent requests the latency percentiles cover.
+    """
+    def __init__(self, build, input_shape, max_batch=32, max_latency=0.005, window=4096):
+        self.build = build
+        self.input_shape = tuple(input_shape)
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.batch_sizes = [0]*(max_batch + 1)
+        self.latencies = collections.deque(maxlen=window)
+
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._build_error = None
+        self._next = None
+        self._thread = threading.Thread(target=self._run, name='model-server', daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=None):
+        """
+        Wait until the model is built and warmed up.
+        """
+        if not self._ready.wait(timeout):
+            return False
+        if self._build_error is not None:
+            raise self._build_error
+        return True
+
+    def submit(self, reading):
+        """
+        Queue one reading.
+
+        returns:
+            - Future with the prediction for this reading
+        """
+        reading = np.asarray(reading, dtype=np.float32).reshape(self.input_shape)
+        future = Future()
+        if self._build_error is not None:
+            future.set_exception(self._build_error)
+            return future
+        self._queue.put((time.perf_counter(), reading, future))
+        if self._build_error is not None:
+            # the build failed while we queued, nobody else will drain it
+            self._fail_pending(self._build_error)
+        return future
+
+    def predict(self, reading, timeout=None):
+        return self.submit(reading).result(timeout)
+
+    @property
+    def failed(self):
+        return self._build_error is not None
+
+    def swap(self, model):
+        """
+        Serve `model` instead, from the next batch on. It is warmed up
+        on the calling thread, so give it a model nothing else is using.
+        """
+        predict = _predictor(model)
+        predict(np.zeros((self.max_batch,) + self.input_shape, dtype=np.float32))
+        self._next = (model, predict)
+
+    def _run(self):
+        try:
+            self.model = self.build()
+            self._predict = _predictor(self.model)
+            # first call traces / allocates, keep it off a real request
+            self._predict(np.zeros((self.max_batch,) + self.input_shape, dtype=np.float32))
+        except Exception as err:
+            self._build_error = err
+            self._ready.set()
+            self._fail_pending(err)
+            return
+        self._ready.set()
+
+        batch = np.empty((self.max_batch,) + self.input_shape, dtype=np.float32)
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            pending = [first]
+            deadline = first[0] + self.max_latency
+            while len(pending) < self.max_batch:
+                wait = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)       # stop after this batch
+                    break
+                pending.append(item)
+            self._serve(batch, pending)
+
+    def _serve(self, batch, pending):
+        if self._next is not None:
+            (self.model, self._predict), self._next = self._next, None
+        n = len(pending)
+        for i, (_, reading, _) in enumerate(pending):
+            batch[i] = reading
+        try:
+            outputs = np.asarray(self._predict(batch[:n]))
+        except Exception as err:
+            self.errors += n
+            for _, _, future in pending:
+                future.set_exception(err)
+            return
+        done = time.perf_counter()
+        for (start, _, future), output in zip(pending, outputs):
+            future.set_result(output)
+            self.latencies.append(done - start)
+        self.requests += n
+        self.batches += 1
+        self.batch_sizes[n] += 1
+
+    def _fail_pending(self, err):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and not item[2].done():
+                item[2].set_exception(err)
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def metrics(self):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "mean_batch": self.requests/self.batches if self.batches else 0.0,
+            "batch_sizes": {n: c for n, c in enumerate(self.batch_sizes) if c},
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50))*1e3,
+                "p99": float(np.percentile(latencies, 99))*1e3,
+                "max": float(latencies.max())*1e3,
+            },
+        }
+
+
+def get_server(name, build=None, input_shape=None, **options):
+    """
+    The server for `name`, started on first use with `build`. A server
+    whose build failed is started again on the next call.
+    """
+    with _servers_lock:
+        if name not in _servers or (_servers[name].failed and build is not None):
+            if build is None:
+                raise KeyError("No model server named {!r}".format(name))
+            _servers[name] = ModelServer(build, input_shape, **options)
+        return _servers[name]
+
+
+def metrics():
+    """
+    Metrics of every running model server, by name.
+    """
+    return {name: server.metrics() for name, server in list(_servers.items())}
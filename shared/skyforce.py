@@ -9,7 +9,7 @@ The above copyright notice and this permission notice shall be included in all c
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import random as rand          # Random library
-import datetime import datetime    # Datetime library
+from datetime import datetime  # Datetime library
 import time as current_time    # Time library
 import math                    # Math library
 
@@ -116,7 +116,7 @@ class Human():
 
     def intro(self):
         print("Found person: {} {} who is {} years old and works as {} onboard.".format(
-            f_name, l_name, age, status))
+            self.f_name, self.l_name, self.age, self.status))
 
     def find_birth_year(self):
         year = datetime.now().year
@@ -142,7 +142,15 @@ class Human():
         self.status = new_status
         print("Successfully changed permissions from {} to {}".format(
             old_status, self.status))
-aaron = Human("Aaron", "Ma", 11, "administrator")
-rohan = Human("Rohan", "Fernandes", 11, "administrator")
-aaron.intro()
-rohan.intro()
\ No newline at end of file
+
+def crew():
+    """
+    Introduce the default crew.
+    - output:
+        - list of Human
+    """
+    aaron = Human("Aaron", "Ma", 11, "administrator")
+    rohan = Human("Rohan", "Fernandes", 11, "administrator")
+    aaron.intro()
+    rohan.intro()
+    return [aaron, rohan]
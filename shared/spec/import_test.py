@@ -0,0 +1,49 @@
+"""
+Cold import budget for the shared package.
+
+Every check runs in a fresh interpreter so nothing is already imported.
+Run with pytest from the repository root, or directly:
+
+    python shared/spec/import_test.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# seconds for `import shared` in a fresh interpreter
+BUDGET = float(os.environ.get("SHARED_IMPORT_BUDGET", "0.25"))
+HEAVY = ("tensorflow", "keras", "pandas", "tkinter")
+
+
+def run(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                         stdout=subprocess.PIPE, universal_newlines=True)
+    return out.stdout.strip()
+
+
+def cold_import_time(repeat=5):
+    # best of a few runs, the first one also pays for a cold disk cache
+    code = "import time; t = time.perf_counter(); import shared; print(time.perf_counter() - t)"
+    return min(float(run(code)) for _ in range(repeat))
+
+
+def test_import_budget():
+    seconds = cold_import_time()
+    assert seconds < BUDGET, "import shared took {:.3f}s, budget is {:.3f}s".format(seconds, BUDGET)
+
+
+def test_import_is_side_effect_free():
+    code = "import shared, sys; print(','.join(m for m in {!r} if m in sys.modules))".format(HEAVY)
+    assert run(code) == ""
+
+
+def test_submodules_load_on_use():
+    code = ("import shared, sys; before = 'shared.components' in sys.modules; "
+            "shared.components; print(before, 'shared.components' in sys.modules)")
+    assert run(code) == "False True"
+
+
+if __name__ == "__main__":
+    print("import shared: {:.4f}s (budget {:.3f}s)".format(cold_import_time(), BUDGET))
@@ -0,0 +1,105 @@
+"""
+Pyramids extended batch by batch against one built from the whole log.
+
+Run with pytest from the repository root:
+
+    python -m pytest shared/spec
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from shared import pyramid
+from shared import telemetry
+
+# small levels so a few thousand records reach the top
+LEVELS = dict(base=4, factor=3, levels=4)
+
+
+def _records(n, channels=2, start=0.0, seed=0):
+    records = np.zeros(n, dtype=telemetry.RECORD)
+    records['time'] = start + np.arange(n)*0.01
+    records['channel'] = np.arange(n) % channels
+    records['value'] = np.random.default_rng(seed).normal(size=n)
+    return records
+
+
+def _files(out_dir):
+    with open(os.path.join(out_dir, 'meta.json')) as file:
+        meta = json.load(file)
+    data = {}
+    for cid in meta['channels']:
+        for name in sorted(os.listdir(os.path.join(out_dir, cid))):
+            with open(os.path.join(out_dir, cid, name), 'rb') as file:
+                data[cid, name] = file.read()
+    return meta, data
+
+
+def _assert_same(a, b):
+    meta_a, files_a = _files(a)
+    meta_b, files_b = _files(b)
+    assert meta_a == meta_b
+    assert files_a == files_b
+
+
+def test_resume_from_carry(tmp_path):
+    records = _records(1001)
+    whole = str(tmp_path/'whole')
+    writer = pyramid.PyramidWriter(whole, **LEVELS)
+    writer.push(records)
+    writer.close()
+    # odd batch sizes leave partial buckets open at every level, and
+    # every batch is pushed by a writer opened from meta.json
+    parts = str(tmp_path/'parts')
+    for start, stop in ((0, 7), (7, 333), (333, 334), (334, 1001)):
+        writer = pyramid.PyramidWriter(parts, **LEVELS)
+        assert writer.records == start
+        writer.push(records[start:stop])
+        writer.close()
+    assert any(carry is not None for carry in writer.meta['carry']['0'])
+    _assert_same(whole, parts)
+
+
+def test_build_catches_up(tmp_path):
+    logs = str(tmp_path/'logs')
+    with telemetry.TelemetryLog(logs, max_bytes=telemetry.HEADER.size + 500*telemetry.RECORD.itemsize,
+                                flush_interval=60) as log:
+        for t, value in enumerate(np.linspace(0.0, 1.0, 700)):
+            log.log('a' if t % 3 else 'b', value, t=float(t))
+    # logged while nothing extended the pyramids
+    with telemetry.TelemetryLog(logs, flush_interval=60, pyramids=False) as log:
+        for t in range(700, 1300):
+            log.log('a', float(t), t=float(t))
+    out = os.path.join(logs, 'pyramids')
+    assert _files(out)[0]['records'] == 700
+    # reopening the log catches its pyramids up
+    telemetry.TelemetryLog(logs, flush_interval=60).close()
+    fresh = str(tmp_path/'fresh')
+    pyramid.build(logs, fresh).close()
+    _assert_same(out, fresh)
+    assert _files(out)[0]['records'] == 1300
+
+
+def test_query_includes_open_buckets(tmp_path):
+    records = _records(5000, channels=1)
+    logs = str(tmp_path/'logs')
+    with telemetry.TelemetryLog(logs, flush_interval=60, pyramids=False) as log:
+        for row in records:
+            log.log('a', row['value'], t=row['time'])
+    pyramid.build(logs, os.path.join(logs, 'pyramids'), **LEVELS).close()
+    pyramids = pyramid.Pyramids(os.path.join(logs, 'pyramids'), logs)
+    for points in (50, 200, 1000):
+        result = pyramids.query('a', points=points)
+        assert result['level'] > 0
+        # every sample is in some bucket, the newest ones in the last
+        assert result['count'].sum() == len(records)
+        assert result['t1'][-1] == records['time'][-1]
+        assert result['max'].max() == records['value'].max()
+        assert np.isclose((result['mean']*result['count']).sum(), records['value'].sum())
+    raw = pyramids.query('a', points=10000)
+    assert raw['level'] == 0 and len(raw['t0']) == len(records)
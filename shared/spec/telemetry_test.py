@@ -0,0 +1,77 @@
+"""
+TelemetryLog rotation and ordering, and LogReader across files.
+
+Run with pytest from the repository root:
+
+    python -m pytest shared/spec
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from shared import telemetry
+
+PER_FILE = 100
+
+
+def _log(directory, times, channel='stage2.pressure', **options):
+    options.setdefault('pyramids', False)
+    # the writer thread never wakes up on its own, flush() writes
+    with telemetry.TelemetryLog(directory, max_bytes=telemetry.HEADER.size +
+                                PER_FILE*telemetry.RECORD.itemsize, flush_interval=60,
+                                **options) as log:
+        for t in times:
+            log.log(channel, 2.0*t, t=float(t))
+        log.flush()
+        return log
+
+
+def test_rotation(tmp_path):
+    log = _log(str(tmp_path), range(250))
+    assert log.records == 250
+    assert log.rotations == 2
+    files = [telemetry.LogFile(path) for path in telemetry.log_files(str(tmp_path))]
+    assert [len(f) for f in files] == [100, 100, 50]
+    assert [f.start for f in files] == [0.0, 100.0, 200.0]
+    for f in files:
+        assert os.path.getsize(f.path) <= log.max_bytes
+
+
+def test_out_of_order(tmp_path):
+    with telemetry.TelemetryLog(str(tmp_path), flush_interval=60, pyramids=False) as log:
+        log.log('a', 1.0, t=10.0)
+        log.log('b', 1.0, t=10.0)           # equal times are in order
+        with pytest.raises(ValueError):
+            log.log('a', 1.0, t=9.0)
+        # stamped records never go back past an explicit one
+        log.log('a', 1.0, t=1e12)
+        log.log('a', 2.0)
+        assert log._pending[-1][0] == 1e12
+
+
+def test_order_survives_reopen(tmp_path):
+    _log(str(tmp_path), range(150))
+    with telemetry.TelemetryLog(str(tmp_path), flush_interval=60, pyramids=False) as log:
+        with pytest.raises(ValueError):
+            log.log('stage2.pressure', 0.0, t=100.0)
+        log.log('stage2.pressure', 0.0, t=149.0)
+        log.flush()
+    # the reopened log starts a new file after the old ones
+    assert len(telemetry.log_files(str(tmp_path))) == 3
+
+
+def test_query_across_files(tmp_path):
+    _log(str(tmp_path), np.arange(0.0, 125.0, 0.5))
+    reader = telemetry.LogReader(str(tmp_path))
+    assert len(reader.files) == 3
+    times, values = reader.query('stage2.pressure', 40.0, 110.5)
+    np.testing.assert_array_equal(times, np.arange(40.0, 110.5, 0.5))
+    np.testing.assert_array_equal(values, 2.0*times)
+    times, _ = reader.query('stage2.pressure')
+    assert len(times) == 250
+    assert len(reader.query('stage2.pressure', 200.0)[0]) == 0
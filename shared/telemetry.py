@@ -0,0 +1,257 @@
+"""
+Binary telemetry log.
+
+Records are fixed 18 byte frames (timestamp f8, channel u2, value f8)
+appended to size-rotated files under logs/:
+
+    logs/channels.json            channel name -> id
+    logs/telemetry-000000.bin     HEADER, then packed RECORDs
+
+A background thread writes whatever was logged since its last pass in
+one write and one fsync, so log() never touches the disk, and extends
+the min/max/mean pyramids (see pyramid.py) with the same batch. Readers
+memory-map a file and binary search the timestamps, a time range costs
+the same however long the flight was:
+
+    log = TelemetryLog()
+    log.log('stage2.pressure', 101.3)
+    ...
+    times, values = LogReader().query('stage2.pressure', t0, t1)
+"""
+import bisect
+import glob
+import json
+import numbers
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+MAGIC = b'ATLG'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd')        # magic, version, record size, start time
+RECORD = np.dtype([('time', '<f8'), ('channel', '<u2'), ('value', '<f8')])   # packed, 18 bytes
+
+
+def _load_channels(directory):
+    try:
+        with open(os.path.join(directory, 'channels.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def log_files(directory=LOG_DIR):
+    return sorted(glob.glob(os.path.join(directory, 'telemetry-*.bin')))
+
+
+class TelemetryLog(object):
+    """
+    Append-only telemetry writer.
+
+    - input:
+        - directory: string
+        - max_bytes: int
+            Size at which a new file is started.
+        - flush_interval: float
+            Seconds between writes (and fsyncs) of the background thread.
+        - pyramids: bool
+            Keep `<directory>/pyramids` up to date as records are written.
+    """
+    def __init__(self, directory=LOG_DIR, max_bytes=64*1024*1024, flush_interval=0.5,
+                 pyramids=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.channels = _load_channels(directory)
+        self.records = 0
+        self.fsyncs = 0
+        self.rotations = 0
+
+        self._pending = []
+        self._lock = threading.Lock()           # guards _pending and channels
+        self._write_lock = threading.Lock()     # one writer pass at a time
+        self._file = None
+        files = log_files(directory)
+        self._seq = int(os.path.basename(files[-1])[10:16]) + 1 if files else 0
+        # newest timestamp on record, readers binary search across files
+        self._last = LogFile(files[-1]).end if files else -np.inf
+        self.pyramids = None
+        if pyramids:
+            from . import pyramid
+            # catches up with records logged while nothing extended them
+            self.pyramids = pyramid.build(directory, os.path.join(directory, 'pyramids'))
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self._thread.start()
+
+    def channel(self, name):
+        """
+        Id of channel `name`, registering it if new.
+        """
+        cid = self.channels.get(name)
+        if cid is None:
+            with self._lock:
+                cid = self.channels.setdefault(name, len(self.channels))
+                tmp = os.path.join(self.directory, 'channels.json.tmp')
+                with open(tmp, 'w') as file:
+                    json.dump(self.channels, file)
+                os.replace(tmp, os.path.join(self.directory, 'channels.json'))
+        return cid
+
+    def log(self, channel, value, t=None):
+        """
+        Queue one record. `channel` is a name or an id from channel().
+
+        Records must arrive in time order: an explicit `t` older than the
+        last record raises ValueError. Without `t` the record is stamped
+        now, or with the last time if the clock stepped back.
+        """
+        if not isinstance(channel, numbers.Integral):
+            channel = self.channel(channel)
+        with self._lock:
+            # stamped and checked under the lock so the log stays sorted
+            if t is None:
+                t = max(time.time(), self._last)
+            elif t < self._last:
+                raise ValueError("Telemetry at {} is older than the last record ({})"
+                                 .format(t, self._last))
+            self._last = t
+            self._pending.append((t, channel, value))
+
+    def _open(self, start):
+        path = os.path.join(self.directory, 'telemetry-{:06d}.bin'.format(self._seq))
+        self._seq += 1
+        self._file = open(path, 'ab')
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, start))
+        self._size = HEADER.size
+
+    def _write(self):
+        with self._write_lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        records = np.array(pending, dtype=RECORD)   # in time order, see log()
+        per_file = max((self.max_bytes - HEADER.size) // RECORD.itemsize, 1)
+        while len(records):
+            if self._file is None or self._size + RECORD.itemsize > self.max_bytes:
+                self._rotate(float(records['time'][0]))
+            room = max((self.max_bytes - self._size) // RECORD.itemsize, 1)
+            chunk, records = records[:min(room, per_file)], records[min(room, per_file):]
+            data = chunk.tobytes()
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += len(data)
+            self.records += len(chunk)
+            self.fsyncs += 1
+            if self.pyramids is not None:
+                self.pyramids.push(chunk)
+
+    def _rotate(self, start):
+        if self._file is not None:
+            self._file.close()
+            self.rotations += 1
+        self._open(start)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._write()
+        self._write()
+
+    def flush(self):
+        """
+        Write everything logged so far now instead of at the next pass.
+        """
+        self._write()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.pyramids is not None:
+            self.pyramids.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LogFile(object):
+    """
+    One memory-mapped log file.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            magic, version, size, self.start = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or size != RECORD.itemsize:
+            raise ValueError("Not a telemetry log: {}".format(path))
+        n = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+        self.records = (np.memmap(path, dtype=RECORD, mode='r', offset=HEADER.size, shape=(n,))
+                        if n else np.zeros(0, dtype=RECORD))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def end(self):
+        return float(self.records['time'][-1]) if len(self) else self.start
+
+    def range(self, t0, t1):
+        """
+        Records with t0 <= time < t1, found by binary search.
+        """
+        # bisect probes ~log2(n) records; np.searchsorted would first copy
+        # the strided time column, reading the whole file
+        times = self.records['time']
+        i0 = bisect.bisect_left(times, t0)
+        i1 = bisect.bisect_left(times, t1, lo=i0)
+        return self.records[i0:i1]
+
+
+class LogReader(object):
+    """
+    Queries over every log file in a directory.
+    """
+    def __init__(self, directory=LOG_DIR):
+        self.directory = directory
+        self.channels = _load_channels(directory)
+        self.files = [LogFile(path) for path in log_files(directory)]
+
+    def query(self, channel, t0=-np.inf, t1=np.inf):
+        """
+        - input:
+            - channel: name or id
+            - t0, t1: float
+                Time range, end exclusive.
+
+        returns:
+            - (times, values) arrays
+        """
+        cid = self.channels[channel] if isinstance(channel, str) else channel
+        times, values = [], []
+        for log in self.files:
+            if log.end < t0 or log.start >= t1:
+                continue
+            rows = log.range(t0, t1)
+            rows = rows[rows['channel'] == cid]
+            times.append(np.asarray(rows['time']))
+            values.append(np.asarray(rows['value']))
+        if not times:
+            return np.zeros(0), np.zeros(0)
+        return np.concatenate(times), np.concatenate(values)
@@ -1 +1,65 @@
-# @TODO(aaronhma): UPDATE
\ No newline at end of file
+"""
+Environment against the U.S. Standard Atmosphere 1976 tables.
+
+Run with pytest from the repository root:
+
+    python -m pytest shared/trajectory/spec
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# trajectory/__init__.py pulls in modules that are not written yet, load the file itself
+_spec = importlib.util.spec_from_file_location(
+    "environment", os.path.join(HERE, os.pardir, "trajectory", "environment.py"))
+environment = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(environment)
+
+# geometric altitude (m): pressure (Pa), density (kg/m^3), temperature (K),
+# speed of sound (m/s), as published to five significant figures
+TABLE = (
+    (0.0,     101325.0, 1.2250,     288.150, 340.29),
+    (1000.0,  89876.0,  1.1117,     281.651, 336.43),
+    (5000.0,  54048.0,  0.73643,    255.676, 320.55),
+    (11000.0, 22700.0,  0.36480,    216.774, 295.15),
+    (20000.0, 5529.3,   0.088910,   216.650, 295.07),
+    (30000.0, 1197.0,   0.018410,   226.509, 301.71),
+    (40000.0, 287.14,   0.0039957,  250.350, 317.19),
+    (50000.0, 79.779,   0.0010269,  270.650, 329.80),
+    (70000.0, 5.2209,   8.2829e-05, 219.585, 297.06),
+)
+RTOL = 1e-4
+
+
+def test_standard_atmosphere():
+    for alt, *expected in TABLE:
+        np.testing.assert_allclose(environment.standard_atmosphere(alt), expected, rtol=RTOL,
+                                   err_msg="at {} m".format(alt))
+
+
+def test_table_lookups():
+    env = environment.Environment()
+    alts = np.array([row[0] for row in TABLE])
+    expected = np.array([row[1:] for row in TABLE])
+    # arrays interpolate in the table
+    np.testing.assert_allclose(np.array(env.properties(alts)).T, expected, rtol=RTOL)
+    # scalars take the cached path and agree with it
+    for alt, *row in TABLE:
+        np.testing.assert_allclose(env.properties(alt), row, rtol=RTOL)
+        assert env.pressure(alt) == env.pressure(np.array([alt]))[0]
+
+
+def test_interpolation_error():
+    env = environment.Environment()
+    alts = np.linspace(0.0, 86000.0, 997)      # off the 10 m grid
+    exact = np.array([environment.standard_atmosphere(a) for a in alts]).T
+    np.testing.assert_allclose(np.array(env.properties(alts)), exact, rtol=1e-6)
+
+
+def test_clamped_outside_table():
+    env = environment.Environment()
+    assert env.pressure(-500.0) == env.pressure(0.0)
+    assert env.pressure(200000.0) == env.pressure(86000.0)
@@ -0,0 +1,78 @@
+"""
+The .params sidecar cache: reused while the source is unchanged,
+rebuilt when it is edited.
+
+Run with pytest from the repository root:
+
+    python -m pytest shared/trajectory/spec
+"""
+import importlib
+import json
+import os
+import sys
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# trajectory/__init__.py pulls in modules that are not written yet, so
+# register the package without running it and import params from it
+_package = types.ModuleType("trajectory")
+_package.__path__ = [os.path.join(HERE, os.pardir, "trajectory")]
+sys.modules.setdefault("trajectory", _package)
+params = importlib.import_module("trajectory.params")
+
+SOURCE = "mass: 1200\nthrust: 4.5e4\n=\nmass: 800\nisp: 310\n"
+PACKAGE = [[1200.0, 45000.0], [800.0, 310.0]]
+
+
+def _write(path, text, mtime_ns):
+    with open(path, "w") as file:
+        file.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _builds(monkeypatch):
+    built = []
+    build = params.Parameters._build
+
+    def counted(self):
+        built.append(self.path)
+        build(self)
+    monkeypatch.setattr(params.Parameters, "_build", counted)
+    return built
+
+
+def test_cache_reused_and_rebuilt(tmp_path, monkeypatch):
+    path = str(tmp_path/"stage2.params")
+    _write(path, SOURCE, 10**18)
+    built = _builds(monkeypatch)
+
+    assert params.Parameters(path).package == PACKAGE
+    assert params.Parameters(path, cache=False).package == PACKAGE
+    assert os.path.exists(path + ".cache.npy") and os.path.exists(path + ".cache.json")
+    assert len(built) == 1
+
+    # unchanged: read from the sidecars
+    first = params.Parameters(path)
+    assert first[1]["isp"] == 310.0
+    assert len(first) == 2
+    assert len(built) == 1
+
+    # touched, same bytes: the hash matches, the new mtime is recorded
+    _write(path, SOURCE, 2*10**18)
+    assert params.Parameters(path).package == PACKAGE
+    assert len(built) == 1
+    with open(path + ".cache.json") as file:
+        assert json.load(file)["mtime"] == 2*10**18
+
+    # edited, same size: the hash differs
+    _write(path, SOURCE.replace("310", "320"), 3*10**18)
+    assert params.Parameters(path).package == [[1200.0, 45000.0], [800.0, 320.0]]
+    assert len(built) == 2
+
+    # edited, new size: rebuilt without hashing
+    _write(path, SOURCE + "=\nmass: 300\n", 3*10**18)
+    assert params.Parameters(path).package == PACKAGE + [[300.0]]
+    assert len(built) == 3
+    assert params.Parameters(path).package == PACKAGE + [[300.0]]
+    assert len(built) == 3
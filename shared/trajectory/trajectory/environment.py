@@ -0,0 +1,128 @@
+"""
+environment.py
+
+U.S. Standard Atmosphere 1976 served from a precomputed table.
+"""
+import functools
+import math
+
+import numpy as np
+
+R_AIR = 287.053        # Specific gas constant of air, J/(kg K)
+GAMMA = 1.4            # Heat ratio of air
+G0 = 9.80665           # Standard gravity, m/s^2
+EARTH_RADIUS = 6356766.0
+
+# Geopotential base altitude (m), base temperature (K), lapse rate (K/m)
+# and base pressure (Pa) of every layer up to 86 km.
+LAYERS = (
+    (0.0,     288.15, -0.0065, 101325.0),
+    (11000.0, 216.65,  0.0,    22632.06),
+    (20000.0, 216.65,  0.001,  5474.889),
+    (32000.0, 228.65,  0.0028, 868.0187),
+    (47000.0, 270.65,  0.0,    110.9063),
+    (51000.0, 270.65, -0.0028, 66.93887),
+    (71000.0, 214.65, -0.002,  3.956420),
+)
+
+PRESSURE, DENSITY, TEMPERATURE, SPEED_OF_SOUND = range(4)
+
+
+def standard_atmosphere(alt):
+    """
+    Evaluate the standard atmosphere formulas at one altitude.
+
+    - input:
+        - alt: float
+            Geometric altitude in meters.
+
+    returns:
+        - (pressure, density, temperature, speed of sound)
+    """
+    h = EARTH_RADIUS*alt/(EARTH_RADIUS + alt)
+    base, T0, lapse, p0 = LAYERS[0]
+    for layer in LAYERS:
+        if h < layer[0]:
+            break
+        base, T0, lapse, p0 = layer
+    T = T0 + lapse*(h - base)
+    if lapse == 0.0:
+        p = p0*math.exp(-G0*(h - base)/(R_AIR*T0))
+    else:
+        p = p0*(T/T0)**(-G0/(lapse*R_AIR))
+    return p, p/(R_AIR*T), T, math.sqrt(GAMMA*R_AIR*T)
+
+
+class Environment(object):
+    """
+    Atmosphere lookups by linear interpolation in an evenly spaced table.
+
+    Altitudes outside [0, ceiling] are clamped to the table ends.
+
+    - input:
+        - ceiling: float
+            Highest altitude in the table, in meters.
+        - step: float
+            Table spacing in meters.
+        - cache_size: int
+            Number of scalar lookups to remember.
+    """
+    def __init__(self, ceiling=86000.0, step=10.0, cache_size=4096):
+        self.step = float(step)
+        self.altitude = np.arange(0.0, ceiling + step, step)
+        self.table = np.array([standard_atmosphere(a) for a in self.altitude]).T.copy()
+        self._last = len(self.altitude) - 1
+        # plain lists for the scalar path, indexing numpy scalars is slower
+        self._rows = self.table.T.tolist()
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, alt):
+        x = alt/self.step
+        if x <= 0.0:
+            return tuple(self._rows[0])
+        i = int(x)
+        if i >= self._last:
+            return tuple(self._rows[self._last])
+        frac = x - i
+        lo = self._rows[i]
+        hi = self._rows[i + 1]
+        return tuple(a + (b - a)*frac for a, b in zip(lo, hi))
+
+    def properties(self, alt):
+        """
+        All four properties at once.
+
+        - input:
+            - alt: float or array
+                Altitude in meters.
+
+        returns:
+            - tuple of (pressure, density, temperature, speed of sound).
+              Scalars for a scalar altitude, otherwise arrays shaped like alt.
+        """
+        if np.ndim(alt) == 0:
+            return self.lookup(float(alt))
+        return tuple(self._interp(alt, slice(None)))
+
+    def _interp(self, alt, column):
+        x = np.clip(np.asarray(alt, dtype=np.float64)/self.step, 0.0, self._last)
+        i = np.minimum(x.astype(np.intp), self._last - 1)
+        lo = self.table[column, i]
+        return lo + (self.table[column, i + 1] - lo)*(x - i)
+
+    def _column(self, alt, column):
+        if np.ndim(alt) == 0:
+            return self.lookup(float(alt))[column]
+        return self._interp(alt, column)
+
+    def pressure(self, alt):
+        return self._column(alt, PRESSURE)
+
+    def density(self, alt):
+        return self._column(alt, DENSITY)
+
+    def temperature(self, alt):
+        return self._column(alt, TEMPERATURE)
+
+    def speed_of_sound(self, alt):
+        return self._column(alt, SPEED_OF_SOUND)
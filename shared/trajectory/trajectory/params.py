@@ -1,29 +1,225 @@
+"""
+params.py
+
+Reader for .params files. Every line is `name: value` and a line
+starting with '=' closes the current subgroup.
+
+Parsed files are cached next to the source as `<file>.cache.npy`
+(one row per value) and `<file>.cache.json` (names, text values and
+the stamp of the source), so loading an unchanged file again is a
+memory map instead of a parse.
+"""
+import hashlib
 import json
-from .trajectory import config
-
-class Parameters:
-    def __init__(self):
-        self.package = []
-        
-        file = open(path, 'r')
-        extension = path.split(".")[1]
-    
-        if extension == "params":
-            subgroup = []
-            
-            for line in file.readlines():
-                if line[0] == '=':
-                    self.package.append(subgroup[:])
+import os
+from array import array
+
+import numpy as np
+
+from . import config
+
+CACHE_VERSION = 1
+
+ROW_DTYPE = np.dtype([
+    ("group", np.uint32),
+    ("name", np.uint32),
+    ("value", np.float64),
+])
+
+
+class Subgroup(object):
+    """
+    One subgroup of a .params file.
+
+    - names: tuple of value names, in file order
+    - values: array('d') or numpy array of the numbers, NaN where the
+      value is not a number
+    - text: dict of position -> value for the ones that are not numbers
+    """
+    def __init__(self, names, values, text):
+        self.names = names
+        self.values = values
+        self.text = text
 
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, name):
+        i = self.names.index(name)
+        if i in self.text:
+            return self.text[i]
+        return self.values[i]
+
+    def tolist(self):
+        return [self.text[i] if i in self.text else float(v)
+                for i, v in enumerate(self.values)]
+
+
+def cast(x):
+    try:
+        return float(x)
+    except ValueError as err:
+        if config.developer != False:
+            print("Received error: {}".format(err))
+        else:
+            return str(x)
+
+
+def iter_subgroups(path, digest=None):
+    """
+    Yield the subgroups of a .params file one at a time.
+
+    - input:
+        - path: string
+        - digest: hashlib object
+            Updated with the raw bytes of the file while it is read.
+    """
+    names = []
+    values = array('d')
+    text = {}
+    with open(path, 'rb') as file:
+        for raw in file:
+            if digest is not None:
+                digest.update(raw)
+            line = raw.decode('utf-8')
+            if line[0] == '=':
+                yield Subgroup(tuple(names), values, text)
+                names = []
+                values = array('d')
+                text = {}
+            elif line.strip():
+                name, _, value = line.partition(':')
+                names.append(name.strip())
+                value = cast(value.strip())
+                if isinstance(value, float):
+                    values.append(value)
                 else:
-                    x = line.split(':')
-                    subgroup.append(self.cast(x[1].strip()))
-                
-    def cast(self, x):
+                    text[len(values)] = value
+                    values.append(float('nan'))
+    if names:
+        yield Subgroup(tuple(names), values, text)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {"mtime": st.st_mtime_ns, "size": st.st_size}
+
+
+def _sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Parameters(object):
+    """
+    A .params file, read lazily.
+
+    - input:
+        - path: string
+            Path of the .params file.
+        - cache: boolean
+            Use (and write) the sidecar cache. Without it every
+            iteration streams the source file.
+    """
+    def __init__(self, path, cache=True):
+        if os.path.splitext(path)[1] != ".params":
+            raise ValueError("Not a .params file: {}".format(path))
+        self.path = path
+        self.cache = cache
+        self._rows = None
+        self._meta = None
+
+    @property
+    def package(self):
+        return [subgroup.tolist() for subgroup in self]
+
+    def __iter__(self):
+        if not self.cache:
+            return iter_subgroups(self.path)
+        self._load()
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self):
+        self._load()
+        return self._meta["groups"]
+
+    def __getitem__(self, i):
+        self._load()
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        # rows are sorted by group, so two binary searches find the subgroup
+        start, stop = np.searchsorted(self._rows["group"], [i, i + 1])
+        rows = self._rows[start:stop]
+        names = self._meta["names"]
+        text = {int(k): v for k, v in self._meta["text"].get(str(i), {}).items()}
+        return Subgroup(tuple(names[n] for n in rows["name"]), rows["value"], text)
+
+    def _load(self):
+        if self._rows is not None:
+            return
+        if not self._cache_valid():
+            self._build()
+        self._rows = np.load(self.path + ".cache.npy", mmap_mode="r")
+
+    def _cache_valid(self):
         try:
-            return float(x)
-        except Exception as err:
-            if config.developer != False:
-                print("Received error: {}".format(err))
-            else:
-                return str(x)
\ No newline at end of file
+            with open(self.path + ".cache.json") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if meta.get("version") != CACHE_VERSION or not os.path.exists(self.path + ".cache.npy"):
+            return False
+        stamp = _stamp(self.path)
+        if meta["size"] != stamp["size"]:
+            return False
+        if meta["mtime"] != stamp["mtime"]:
+            # touched but maybe not changed, the hash decides
+            if _sha1(self.path) != meta["sha1"]:
+                return False
+            meta.update(stamp)
+            self._write_meta(meta)
+        self._meta = meta
+        return True
+
+    def _build(self):
+        stamp = _stamp(self.path)
+        digest = hashlib.sha1()
+        groups = array('I')
+        ids = array('I')
+        values = array('d')
+        names = {}
+        text = {}
+        count = 0
+        for g, subgroup in enumerate(iter_subgroups(self.path, digest)):
+            for name in subgroup.names:
+                ids.append(names.setdefault(name, len(names)))
+            groups.extend([g]*len(subgroup))
+            values.extend(subgroup.values)
+            if subgroup.text:
+                text[str(g)] = {str(i): v for i, v in subgroup.text.items()}
+            count = g + 1
+
+        rows = np.empty(len(values), dtype=ROW_DTYPE)
+        rows["group"] = np.frombuffer(groups, dtype=np.uint32)
+        rows["name"] = np.frombuffer(ids, dtype=np.uint32)
+        rows["value"] = np.frombuffer(values, dtype=np.float64)
+        tmp = self.path + ".cache.npy.tmp"
+        with open(tmp, 'wb') as file:
+            np.save(file, rows)
+        os.replace(tmp, self.path + ".cache.npy")
+
+        meta = dict(stamp, version=CACHE_VERSION, sha1=digest.hexdigest(),
+                    names=sorted(names, key=names.get), groups=count, text=text)
+        self._write_meta(meta)
+        self._meta = meta
+
+    def _write_meta(self, meta):
+        tmp = self.path + ".cache.json.tmp"
+        with open(tmp, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp, self.path + ".cache.json")
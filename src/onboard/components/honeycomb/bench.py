@@ -0,0 +1,100 @@
+"""
+Requests per second and latency of Honeycomb across worker counts.
+
+Starts prefork.py once per worker count and hits it from separate client
+processes:
+
+    python bench.py --workers 1 2 4 --clients 16 --seconds 5 --path /homepage
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def client(args):
+    """
+    Send requests back to back until `until`, one connection each.
+
+    returns:
+        - list of latencies in seconds, number of errors
+    """
+    host, port, path, until = args
+    request = "GET {} HTTP/1.1\r\nHost: honeycomb\r\nConnection: close\r\n\r\n".format(path).encode()
+    latencies = []
+    errors = 0
+    while time.time() < until:
+        start = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=5) as sock:
+                sock.sendall(request)
+                head = sock.recv(65536)
+                while sock.recv(65536):
+                    pass
+            if not head.startswith((b"HTTP/1.0 200", b"HTTP/1.1 200")):
+                errors += 1
+                continue
+        except OSError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def wait_for_port(host, port, timeout=30.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            socket.create_connection((host, port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("honeycomb did not start on {}:{}".format(host, port))
+
+
+def measure(workers, clients, seconds, path, host='127.0.0.1', port=7790):
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, 'prefork.py'),
+                               '--host', host, '--port', str(port), '--workers', str(workers)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(host, port)
+        # warm up every worker's page cache
+        client((host, port, path, time.time() + 0.5))
+        until = time.time() + seconds
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client, [(host, port, path, until)]*clients)
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = np.concatenate([np.asarray(r[0]) for r in results]) if results else np.zeros(0)
+    if latencies.size == 0:
+        latencies = np.zeros(1)
+    return {
+        "workers": workers,
+        "clients": clients,
+        "requests": int(latencies.size),
+        "errors": sum(r[1] for r in results),
+        "rps": latencies.size/seconds,
+        "p50_ms": float(np.percentile(latencies, 50))*1e3,
+        "p99_ms": float(np.percentile(latencies, 99))*1e3,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Honeycomb throughput benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--path', default='/homepage')
+    parser.add_argument('--port', type=int, default=7790)
+    args = parser.parse_args()
+    for workers in args.workers:
+        print(json.dumps(measure(workers, args.clients, args.seconds, args.path, port=args.port)), flush=True)
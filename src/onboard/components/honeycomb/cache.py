@@ -0,0 +1,211 @@
+"""
+Response caching for Honeycomb.
+
+PageCache keeps rendered templates keyed on template and arguments and
+answers repeat requests with 304 when the browser already has the page.
+StaticAssets serves files from assets/ (the pages' stylesheets, through
+asset_url()) with year-long cache headers and the precompressed .br / .gz
+variant the browser accepts. Build the
+variants once before flight:
+
+    python cache.py assets
+"""
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, request, send_file, url_for, abort
+from werkzeug.http import http_date
+
+try:
+    import brotli
+except ImportError:                     # gzip only
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json', '.txt', '.map')
+# preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+YEAR = 365*24*3600
+
+
+class PageCache(object):
+    """
+    Memoized template rendering with ETag / Last-Modified validation.
+
+    - input:
+        - app: Flask app
+        - max_entries: int
+            Rendered pages kept, least recently used are dropped.
+    """
+    def __init__(self, app=None, max_entries=256):
+        self.max_entries = max_entries
+        self.pages = OrderedDict()
+        self._lock = threading.Lock()   # threaded servers share one cache
+        self.hits = 0
+        self.misses = 0
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['page_cache'] = self
+
+    def _page(self, template, context):
+        key = (template, tuple(sorted(context.items())))
+        with self._lock:
+            page = self.pages.get(key)
+            if page is not None and page[0].is_up_to_date:
+                self.pages.move_to_end(key)
+                self.hits += 1
+                return page
+            self.misses += 1
+        # rendered outside the lock, two threads may both render a new page
+        tmpl = self.app.jinja_env.get_template(template)
+        body = tmpl.render(**context).encode('utf-8')
+        # headers are built once per page, not per request
+        headers = [('ETag', '"{}"'.format(hashlib.sha1(body).hexdigest())),
+                   ('Cache-Control', 'no-cache')]      # keep it, but ask us first
+        if tmpl.filename:
+            headers.append(('Last-Modified', http_date(os.path.getmtime(tmpl.filename))))
+        page = (tmpl, body, headers)
+        with self._lock:
+            self.pages[key] = page
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.max_entries:
+                self.pages.popitem(last=False)
+        return page
+
+    def render(self, template, **context):
+        """
+        Drop-in for flask.render_template. Context values must be
+        hashable, anything else is rendered every time.
+
+        returns:
+            - Response, 304 when the request's validators still match
+        """
+        try:
+            hash(tuple(context.values()))
+        except TypeError:
+            tmpl = self.app.jinja_env.get_template(template)
+            return Response(tmpl.render(**context), mimetype='text/html')
+        _, body, headers = self._page(template, context)
+        if self._fresh(headers):
+            return Response(status=304, headers=headers)
+        return Response(body, headers=headers, mimetype='text/html')
+
+    @staticmethod
+    def _fresh(headers):
+        # browsers send back exactly the validators they were given
+        match = request.headers.get('If-None-Match')
+        if match is not None:
+            return match == '*' or headers[0][1] in match
+        since = request.headers.get('If-Modified-Since')
+        return since is not None and len(headers) > 2 and since == headers[2][1]
+
+    def clear(self):
+        with self._lock:
+            self.pages.clear()
+
+    def stats(self):
+        return {"entries": len(self.pages), "hits": self.hits, "misses": self.misses}
+
+
+def precompress(folder, level=9):
+    """
+    Write .gz (and .br when brotli is installed) next to every
+    compressible file in `folder` whose variant is missing or stale.
+
+    returns:
+        - list of written paths
+    """
+    written = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as file:
+                data = file.read()
+            variants = [('.gz', lambda d: gzip.compress(d, level, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', lambda d: brotli.compress(d, quality=11)))
+            for ext, compress in variants:
+                target = path + ext
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                packed = compress(data)
+                if len(packed) >= len(data):
+                    continue            # not worth it, serve the original
+                with open(target, 'wb') as file:
+                    file.write(packed)
+                written.append(target)
+    return written
+
+
+class StaticAssets(object):
+    """
+    Serve a folder with long-lived cache headers and precompressed variants.
+
+    URLs made with asset_url() carry a content hash, so a changed file
+    gets a new URL and the year-long max-age is safe.
+
+    - input:
+        - app: Flask app
+        - folder: string
+        - url_path: string
+        - max_age: int
+            Seconds browsers may keep an asset.
+    """
+    def __init__(self, app, folder, url_path='/assets', max_age=YEAR):
+        self.folder = os.path.abspath(folder)
+        self.max_age = max_age
+        self._versions = {}
+        app.add_url_rule(url_path + '/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def version(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime, stat.st_size)
+        if key not in self._versions:
+            with open(path, 'rb') as file:
+                self._versions[key] = hashlib.sha1(file.read()).hexdigest()[:12]
+        return self._versions[key]
+
+    def url(self, filename):
+        path = os.path.join(self.folder, filename)
+        return url_for('assets', filename=filename, v=self.version(path))
+
+    def serve(self, filename):
+        path = os.path.normpath(os.path.join(self.folder, filename))
+        if not path.startswith(self.folder + os.sep) or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        accepted = request.accept_encodings
+        for encoding, ext in ENCODINGS:
+            variant = path + ext
+            if (accepted[encoding] and os.path.exists(variant) and
+                    os.path.getmtime(variant) >= os.path.getmtime(path)):
+                response = send_file(variant, mimetype=mimetype, conditional=True,
+                                     max_age=self.max_age)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_file(path, mimetype=mimetype, conditional=True, max_age=self.max_age)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        if request.args.get('v'):
+            response.cache_control.immutable = True
+        return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Precompress Honeycomb assets')
+    parser.add_argument('folder', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets'))
+    args = parser.parse_args()
+    for path in precompress(args.folder):
+        print(path)
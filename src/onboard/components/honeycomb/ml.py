@@ -1,4 +1,8 @@
-import tensorflow as tf #@TODO(aaronhma): Get the Tenserflow to activate
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../'))
+
+from shared.backend import tf # TensorFlow is loaded the first time a model is built
 
 # @NOTE This will be taken and given to the server.py,or it will be import via the file importation with functions
 #Add the functions to be able to use measure and collect data 
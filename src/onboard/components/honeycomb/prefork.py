@@ -0,0 +1,115 @@
+"""
+Pre-fork WSGI runner for Honeycomb, standard library only.
+
+The parent binds the port, imports the app once and forks the workers,
+which all accept on the same socket. Dead workers are replaced, SIGTERM
+or Ctrl-C stops them all:
+
+    python prefork.py --workers 4 --port 7777
+
+The worker count defaults to HONEYCOMB_WORKERS or the number of CPUs.
+"""
+import argparse
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class QuietHandler(WSGIRequestHandler):
+    # a log line per request costs more than serving a cached page
+    def log_message(self, format, *args):
+        pass
+
+
+def load(target):
+    """
+    'module:attribute' -> WSGI app
+    """
+    module, _, name = target.partition(':')
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    return getattr(importlib.import_module(module), name or 'app')
+
+
+def listen(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def serve(sock, app, access_log=False):
+    """
+    Worker: accept on the inherited socket until told to stop.
+    """
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    handler = WSGIRequestHandler if access_log else QuietHandler
+    server = WSGIServer(sock.getsockname(), handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.server_name = socket.getfqdn(sock.getsockname()[0])
+    server.server_port = sock.getsockname()[1]
+    server.setup_environ()
+    server.set_app(app)
+    server.serve_forever()
+
+
+def spawn(sock, app, access_log):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            serve(sock, app, access_log)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def run(app, host='0.0.0.0', port=7777, workers=None, access_log=False):
+    """
+    Fork `workers` processes serving `app` and keep them running.
+    """
+    workers = workers or int(os.environ.get('HONEYCOMB_WORKERS', 0)) or os.cpu_count() or 1
+    sock = listen(host, port)
+    children = set(spawn(sock, app, access_log) for _ in range(workers))
+    print("honeycomb: {} workers on {}:{}".format(workers, host, sock.getsockname()[1]), flush=True)
+
+    stopping = []
+    def stop(*_):
+        stopping.append(True)
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            # a worker died, replace it
+            time.sleep(0.1)
+            children.add(spawn(sock, app, access_log))
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Honeycomb pre-fork server')
+    parser.add_argument('app', nargs='?', default='wsgi:app', help='module:attribute')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+    run(load(args.app), args.host, args.port, args.workers, args.access_log)
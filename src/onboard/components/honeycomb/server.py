@@ -1,92 +1,138 @@
+import os
 import sys
-sys.path.append('../../../../')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../'))
 
-from flask import Flask, render_template, redirect, request
+from flask import Flask, render_template, redirect, request, jsonify
 from shared import components
 from shared import Gui
 from shared import medical
 from shared import skyforce
 from shared import error
+from shared import pyramid
+import cache
 
-app = Flask(__name__)
-
-
-
-    
-@app.route('/')
-def home():
-    return render_template("rocket.html")
-
-@app.route('/homepage')
-def homepage():
-    c1 = "Navigation"
-    c2 = "Guidiance"
-    c3 = "Cooling"
-    c4 = "Heater"
-    c5 = "Computer"
-    c6 = "Honeycomb"
-    c7 = "Engine"
-    c8 = "Thruster"
-    c9 = "Communications"
-    return render_template("home.html",c1 = c1,c2 = c2, c3 = c3, c4 = c4,c5= c5,c6=c6,c7=c7,c8=c8,c9=c9)
-
-@app.route('/rocket')
-def rocket():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    return redirect('/')
-
-@app.route('/support')
-def support(): 
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    return render_template("support.html")
-
-@app.route('/medical')
-def medical():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    if request.method == "GET":
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_app(config=None):
+    """
+    Honeycomb application factory. Import this from a WSGI server
+    (see wsgi.py) instead of running the dev server.
+
+    - input:
+        - config: dict
+            Extra Flask config, e.g. {'TESTING': True}
+    """
+    app = Flask(__name__)
+    if config:
+        app.config.update(config)
+    pages = cache.PageCache(app)
+    cache.StaticAssets(app, os.path.join(HERE, 'assets'))
+
+    @app.route('/')
+    def home():
+        return pages.render("rocket.html")
+
+    @app.route('/homepage')
+    def homepage():
+        c1 = "Navigation"
+        c2 = "Guidiance"
+        c3 = "Cooling"
+        c4 = "Heater"
+        c5 = "Computer"
+        c6 = "Honeycomb"
+        c7 = "Engine"
+        c8 = "Thruster"
+        c9 = "Communications"
+        return pages.render("home.html",c1 = c1,c2 = c2, c3 = c3, c4 = c4,c5= c5,c6=c6,c7=c7,c8=c8,c9=c9)
+
+    @app.route('/rocket')
+    def rocket():
+        #@TODO(aaronhma): make err get passed
+        #error.error_handler(err)
+        return redirect('/')
+
+    @app.route('/support')
+    def support():
+        #@TODO(aaronhma): make err get passed
+        #error.error_handler(err)
+        return pages.render("support.html")
+
+    @app.route('/medical', endpoint='medical', methods=['GET', 'POST'])
+    def medical_page():   # named so it doesn't shadow shared.medical
+        #@TODO(aaronhma): make err get passed
+        #error.error_handler(err)
+        if request.method == "GET":
+            #@TODO(aaronhma): make err get passed
+            #error.error_handler(err)
+            # @NOTE what to do when you are using GET including adding variables
+            medical.__init__()
+            return render_template("Medical.html")
+        elif request.method == "POST":
+            #@TODO(aaronhma): make err get passed
+            #error.error_handler(err)
+            # @NOTE this is what happens when people submit the form
+            # @NOTE lets use python for the medical info ( log the info)
+            # queued for the batched model, the page doesn't wait for it
+            medical.post({"severely injured": 1.0 if request.form.get("severely injured") else 0.0})
+            print("POST method called!")
+            return render_template("Medical.html")
+
+    @app.route('/medical/metrics')
+    def medical_metrics():
+        # batch sizes and latency of the model servers, for the dashboard
+        return jsonify(medical.metrics())
+
+    @app.route('/telemetry/query')
+    def telemetry_query():
+        # plot-sized min/max/mean of a recorded channel, see shared/pyramid.py
+        # TelemetryLog extends the pyramids as it writes, Pyramids picks that up
+        args = request.args
+        if not args.get('channel'):
+            return jsonify({"error": "channel is required"}), 400
+        points = args.get('points', 1000, type=int)
+        if points < 1:
+            return jsonify({"error": "points must be at least 1"}), 400
+        if 'pyramids' not in app.extensions:
+            app.extensions['pyramids'] = pyramid.Pyramids()
+        try:
+            result = app.extensions['pyramids'].query(
+                args['channel'],
+                args.get('t0', float('-inf'), type=float),
+                args.get('t1', float('inf'), type=float),
+                points)
+        except KeyError:
+            return jsonify({"error": "unknown channel {}".format(args['channel'])}), 404
+        return jsonify({k: v if k == 'level' else v.tolist() for k, v in result.items()})
+
+    @app.route('/guidance')
+    def guidance():
+        #@TODO(aaronhma): make err get passed
+        #error.error_handler(err)
+        # @NOTE: keep this here to tell astronauts guidance was migrated to another system - APPROVED
+        return pages.render("migrated/guidance.html")
+
+    @app.route('/games')
+    def games_home():
+        #@TODO(aaronhma): make err get passed
+        #error.error_handler(err)
+        return pages.render("games/home.html")
+
+    @app.route('/disney')
+    def disney():
         #@TODO(aaronhma): make err get passed
-        error.error_handler(err)
-        # @NOTE what to do when you are using GET including adding variables
-        medical.__init__()
-        return render_template("Medical.html")
-    elif request.method == "POST":
+        #error.error_handler(err)
+        return pages.render('disney.html')
+
+    @app.route('/appletv')
+    def appletv():
         #@TODO(aaronhma): make err get passed
         #error.error_handler(err)
-        # @NOTE this is what happens when people submit the form 
-        # @NOTE lets use python for the medical info ( log the info)
-        medical.post()
-        print("POST method called!")
-        return render_template("Medical.html")
-        
-@app.route('/guidance')
-def guidance():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    # @NOTE: keep this here to tell astronauts guidance was migrated to another system - APPROVED
-    return render_template("migrated/guidance.html")
-
-@app.route('/games')
-def games_home():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    return render_template("games/home.html")
-
-@app.route('/disney')
-def disney():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    return render_template('disney.html')
-
-@app.route('/appletv')
-def appletv():
-    #@TODO(aaronhma): make err get passed
-    #error.error_handler(err)
-    return render_template('appletv.html')
-
-app.run(port=7777) 
-# @TODO(aaronhma): Make this work:
-# @NOTE: this won't work as server issues
-# del app
+        return pages.render('appletv.html')
+
+    return app
+
+
+if __name__ == "__main__":
+    # development only, use prefork.py or a WSGI server in flight
+    create_app().run(port=7777)
@@ -1,3 +1,11 @@
-import pandas as pd
-service_worker = pd.read_json('./service_worker.json') # load the json file
-print(serviceworker.head(4))
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../'))
+
+from shared import manifest
+service_worker = manifest.ManifestStore(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service-worker.json')) # loaded on first lookup
+
+if __name__ == "__main__":
+    for entry in list(service_worker)[:4]:
+        print(entry)
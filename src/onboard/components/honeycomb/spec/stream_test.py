@@ -0,0 +1,67 @@
+"""
+The telemetry stream against a viewer that never reads.
+
+Run with pytest from the repository root:
+
+    python -m pytest src/onboard/components/honeycomb/spec
+"""
+import asyncio
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telemetry
+
+
+async def _feed(records, started):
+    await started.wait()
+    payload = "x"*200
+    for i in range(records):
+        yield {"t": i, "payload": payload}
+        await asyncio.sleep(0)
+
+
+async def _stalled_viewer_is_disconnected():
+    loop = asyncio.get_running_loop()
+    broadcaster = telemetry.Broadcaster(depth=8)
+    server = await asyncio.start_server(telemetry.handler(broadcaster), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+
+    stalled = socket.socket()
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled.setblocking(False)
+    await loop.sock_connect(stalled, ('127.0.0.1', port))
+    await loop.sock_sendall(stalled, b"GET /telemetry HTTP/1.1\r\n\r\n")
+    while not broadcaster.clients:
+        await asyncio.sleep(0.01)
+    client = next(iter(broadcaster.clients))
+
+    started = asyncio.Event()
+    producer = asyncio.ensure_future(telemetry.pump(_feed(20000, started), broadcaster))
+    started.set()
+    await producer
+    try:
+        assert broadcaster.dropped == 1
+        assert not broadcaster.clients
+        # the stream writing to it is gone, not parked in drain()
+        await asyncio.wait_for(client.task, 1.0)
+        assert client.writer.transport.is_closing()
+        # and so is the connection: reading ends (reset or EOF) instead of
+        # waiting on a socket the server still holds open
+        async def read_to_end():
+            while await loop.sock_recv(stalled, 65536):
+                pass
+        try:
+            await asyncio.wait_for(read_to_end(), 2.0)
+        except ConnectionResetError:
+            pass
+    finally:
+        stalled.close()
+        server.close()
+        await server.wait_closed()
+
+
+def test_stalled_viewer_is_disconnected():
+    asyncio.run(_stalled_viewer_is_disconnected())
@@ -0,0 +1,222 @@
+"""
+Live telemetry for the Honeycomb dashboard.
+
+One feed is fanned out to every viewer as Server-Sent Events:
+
+    GET /telemetry          text/event-stream, one event per record
+    GET /telemetry/stats    JSON counters
+
+Each viewer has a bounded queue. A viewer that falls so far behind that
+its queue is full is disconnected, the feed never waits on a viewer.
+Runs on asyncio alone, next to the Flask server:
+
+    python telemetry.py --port 7778 --rate 20
+
+In the browser: new EventSource('http://<host>:7778/telemetry')
+"""
+import argparse
+import asyncio
+import json
+import math
+import socket
+import time
+
+SEND_BUFFER = 16*1024                   # bytes buffered per viewer outside its queue
+
+
+class Client(object):
+    """
+    One connected viewer.
+    """
+    def __init__(self, writer, depth):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=depth)
+        self.sent = 0
+        self.task = None                # the _stream writing to it
+
+
+class Broadcaster(object):
+    """
+    Fan one feed out to many clients.
+
+    - input:
+        - depth: int
+            Events a client may have waiting before it is dropped.
+    """
+    def __init__(self, depth=64):
+        self.depth = depth
+        self.clients = set()
+        self.published = 0
+        self.dropped = 0
+        self.connected = 0
+
+    def subscribe(self, writer):
+        client = Client(writer, self.depth)
+        self.clients.add(client)
+        self.connected += 1
+        return client
+
+    def unsubscribe(self, client):
+        self.clients.discard(client)
+
+    def publish(self, record):
+        """
+        Encode `record` once and queue it for every client.
+        """
+        self.published += 1
+        event = "id: {}\ndata: {}\n\n".format(self.published, json.dumps(record)).encode()
+        for client in list(self.clients):
+            try:
+                client.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # too slow, let it go instead of holding the feed back
+                self.dropped += 1
+                self.drop(client)
+
+    def drop(self, client):
+        """
+        Disconnect `client` now. close() would wait to flush what the
+        viewer is not reading, so the socket is reset instead, and the
+        stream blocked writing to it is cancelled.
+        """
+        self.unsubscribe(client)
+        client.writer.transport.abort()
+        if client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "connected": self.connected,
+            "dropped": self.dropped,
+            "published": self.published,
+        }
+
+
+async def simulated_feed(rate=20.0):
+    """
+    Ascent telemetry at `rate` records per second, for running without a
+    vehicle. Ticks on absolute times so the rate does not drift.
+    """
+    period = 1.0/rate
+    start = time.monotonic()
+    tick = 0
+    while True:
+        t = tick*period
+        yield {
+            "time": time.time(),
+            "t": t,
+            "altitude": 0.5*30.0*t**2,
+            "velocity": 30.0*t,
+            "pitch": 90.0 - min(t, 60.0),
+            "temperature": 290.0 + 5.0*math.sin(t),
+        }
+        tick += 1
+        await asyncio.sleep(max(0.0, start + tick*period - time.monotonic()))
+
+
+async def pump(feed, broadcaster):
+    async for record in feed:
+        broadcaster.publish(record)
+
+
+def _response(writer, status, body, content_type='application/json'):
+    writer.write("HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\n"
+                 "Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n"
+                 .format(status, content_type, len(body)).encode() + body)
+
+
+async def _stream(client, broadcaster, heartbeat):
+    writer = client.writer
+    client.task = asyncio.current_task()
+    # keep the kernel from buffering megabytes for a stalled viewer,
+    # so a backlog shows up in its queue
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+    writer.transport.set_write_buffer_limits(high=SEND_BUFFER)
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                 b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                 b"Connection: keep-alive\r\n\r\n")
+    try:
+        while not writer.is_closing():
+            try:
+                events = [await asyncio.wait_for(client.queue.get(), heartbeat)]
+            except asyncio.TimeoutError:
+                writer.write(b": heartbeat\n\n")  # keeps proxies from closing idle streams
+                await writer.drain()
+                continue
+            # everything that queued up while we waited goes out in one write
+            while not client.queue.empty():
+                events.append(client.queue.get_nowait())
+            writer.write(b"".join(events))
+            await writer.drain()
+            client.sent += len(events)
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        broadcaster.unsubscribe(client)
+        writer.close()
+
+
+def handler(broadcaster, heartbeat=15.0):
+    """
+    asyncio.start_server callback serving the telemetry routes.
+    """
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass                    # headers are not needed
+        except ConnectionError:
+            writer.close()
+            return
+        parts = request.decode('latin-1').split()
+        path = parts[1] if len(parts) > 1 else ''
+        if path == '/telemetry':
+            await _stream(broadcaster.subscribe(writer), broadcaster, heartbeat)
+            return
+        if path == '/telemetry/stats':
+            _response(writer, '200 OK', json.dumps(broadcaster.stats()).encode())
+        else:
+            _response(writer, '404 Not Found', b'{"error": "not found"}')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host='0.0.0.0', port=7778, rate=20.0, depth=64, feed=None, ready=None):
+    """
+    Run the telemetry server until cancelled.
+
+    - input:
+        - feed: async iterable of dict records
+            Defaults to simulated_feed(rate).
+        - ready: asyncio.Event
+            Set once the server is listening.
+    """
+    broadcaster = Broadcaster(depth)
+    server = await asyncio.start_server(handler(broadcaster), host, port, backlog=1024)
+    producer = asyncio.ensure_future(pump(feed or simulated_feed(rate), broadcaster))
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        producer.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Honeycomb telemetry stream')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=7778)
+    parser.add_argument('--rate', type=float, default=20.0, help='Records per second')
+    parser.add_argument('--depth', type=int, default=64, help='Per client queue length')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.rate, args.depth))
+    except KeyboardInterrupt:
+        pass
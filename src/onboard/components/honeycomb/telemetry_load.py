@@ -0,0 +1,140 @@
+"""
+Load test for the telemetry stream.
+
+Starts telemetry.py in its own process (or uses --host/--port of a running
+one), connects hundreds of simulated dashboards plus a few that never read,
+and reports delivery rate, latency percentiles and drops:
+
+    python telemetry_load.py --clients 500 --stalled 10 --seconds 10
+
+At the defaults every stalled client is dropped well within the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+async def viewer(host, port, until, latencies):
+    """
+    A dashboard: read events and record publish-to-receive latency.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    writer.write(b"GET /telemetry HTTP/1.1\r\nHost: honeycomb\r\n\r\n")
+    received = 0
+    pending = b""
+    try:
+        while time.time() < until:
+            # whole reads, not a readline per line, so one process can
+            # play hundreds of viewers without becoming the bottleneck
+            chunk = await asyncio.wait_for(reader.read(1 << 16), max(until - time.time(), 0.01))
+            if not chunk:
+                break
+            events = (pending + chunk).split(b"\n\n")
+            pending = events.pop()
+            now = time.time()
+            for event in events:
+                data = event.find(b"data: ")
+                if data >= 0:
+                    latencies.append(now - json.loads(event[data + 6:])["time"])
+                    received += 1
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+    return received
+
+
+async def stalled(host, port, until):
+    """
+    A dashboard that stops reading, the server should drop it.
+    """
+    # small receive buffer so the backlog reaches the server's queue quickly
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_event_loop().sock_connect(sock, (host, port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    writer.write(b"GET /telemetry HTTP/1.1\r\nHost: honeycomb\r\n\r\n")
+    await asyncio.sleep(max(until - time.time(), 0))
+    writer.close()
+
+
+async def stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /telemetry/stats HTTP/1.1\r\nHost: honeycomb\r\n\r\n")
+    body = (await reader.read()).split(b"\r\n\r\n", 1)[1]
+    writer.close()
+    return json.loads(body)
+
+
+async def run(host, port, clients, stalled_clients, seconds):
+    until = time.time() + seconds
+    latencies = []
+    tasks = [viewer(host, port, until, latencies) for _ in range(clients)]
+    tasks += [stalled(host, port, until) for _ in range(stalled_clients)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    received = [r for r in results[:clients] if isinstance(r, int)]
+    errors = sum(isinstance(r, Exception) for r in results)
+    server = await stats(host, port)
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "clients": clients,
+        "stalled": stalled_clients,
+        "errors": errors,
+        "events_per_client": float(np.mean(received)) if received else 0.0,
+        "events_per_second": sum(received)/seconds,
+        "latency_ms": {
+            "p50": float(np.percentile(lat, 50))*1e3,
+            "p99": float(np.percentile(lat, 99))*1e3,
+            "max": float(lat.max())*1e3,
+        },
+        "server": server,
+    }
+
+
+def wait_for_port(host, port, timeout=10.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            socket.create_connection((host, port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("telemetry server did not start on {}:{}".format(host, port))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Telemetry stream load test')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7778)
+    parser.add_argument('--external', action='store_true', help='Use an already running server')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--stalled', type=int, default=5, help='Clients that never read')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=250.0,
+                        help='Records per second, high enough that stalled clients are dropped')
+    parser.add_argument('--depth', type=int, default=64)
+    args = parser.parse_args()
+
+    server = None
+    if not args.external:
+        server = subprocess.Popen([sys.executable, os.path.join(HERE, 'telemetry.py'),
+                                   '--host', args.host, '--port', str(args.port),
+                                   '--rate', str(args.rate), '--depth', str(args.depth)])
+    try:
+        wait_for_port(args.host, args.port)
+        print(json.dumps(asyncio.run(run(args.host, args.port, args.clients, args.stalled,
+                                         args.seconds)), indent=2))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for Honeycomb.
+
+    gunicorn -w 4 -b 0.0.0.0:7777 wsgi:app
+    python prefork.py --workers 4
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server import create_app
+
+app = create_app()
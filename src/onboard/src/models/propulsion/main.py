@@ -1,5 +1,5 @@
 import numpy as np
-from .src import theromodynamical
+from .src import thermodynamical
 from .src import nozzle
 
 thermo = thermodynamical.ThermoDynamical()
@@ -0,0 +1,37 @@
+"""
+exit_mach against its inverse, area_ratio.
+
+Run with pytest from the repository root:
+
+    python -m pytest src/onboard/src/models/propulsion/spec
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import sweep
+
+
+def test_exit_mach_round_trip():
+    eps = np.concatenate((np.linspace(1.001, 2, 20, endpoint=False), np.linspace(2, 500, 250)))
+    for k in (1.12, 1.2, 1.25, 1.3, 1.4, 1.67):
+        M = sweep.exit_mach(eps, k)
+        assert np.all(M > 1)
+        assert np.all(np.diff(M) > 0)
+        np.testing.assert_allclose(sweep.area_ratio(M, k), eps, rtol=1e-12,
+                                   err_msg="k = {}".format(k))
+
+
+def test_exit_mach_broadcasts():
+    k = np.array([1.15, 1.25, 1.35])[:, None]
+    eps = np.array([0.5, 1.0, 4.0, 300.0])[None, :]
+    M = sweep.exit_mach(eps, k)
+    assert M.shape == (3, 4)
+    assert np.all(M[:, :2] == 1.0)
+    np.testing.assert_allclose(sweep.area_ratio(M[:, 2:], k), np.broadcast_to(eps[:, 2:], (3, 2)),
+                               rtol=1e-12)
+    # 4:1 with k = 1.4 from the isentropic tables
+    assert abs(sweep.exit_mach(4.0, 1.4) - 2.940) < 1e-3
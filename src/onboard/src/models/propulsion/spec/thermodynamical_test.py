@@ -0,0 +1,48 @@
+"""
+ThermoDynamical's saved table and its interpolation.
+
+Run with pytest from the repository root:
+
+    python -m pytest src/onboard/src/models/propulsion/spec
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import thermodynamical
+
+
+def test_table_built_on_first_lookup(tmp_path):
+    path = str(tmp_path/'cache'/'table.npz')
+    thermo = thermodynamical.ThermoDynamical(path)
+    assert not os.path.exists(path)
+    first = thermo.properties(4.0, 5e6)
+    assert os.path.exists(path)
+    # a new instance reads it back instead of building and saving again
+    saved = os.stat(path).st_mtime_ns
+    assert thermodynamical.ThermoDynamical(path).properties(4.0, 5e6) == first
+    assert os.stat(path).st_mtime_ns == saved
+    # and the default lives outside the source tree
+    package = os.path.dirname(os.path.abspath(thermodynamical.__file__))
+    assert not os.path.abspath(thermodynamical.TABLE_PATH).startswith(package)
+
+
+def test_single_point_axes():
+    of = np.array([3.0, 4.0, 5.0, 6.0])
+    pc = np.array([2e6, 5e6, 9e6])
+    full = thermodynamical.ThermoDynamical(None, of=of, pc=pc)
+    one_pc = thermodynamical.ThermoDynamical(None, of=of, pc=[5e6])
+    one_of = thermodynamical.ThermoDynamical(None, of=[4.0], pc=pc)
+    point = thermodynamical.ThermoDynamical(None, of=[4.0], pc=[5e6])
+    OF, PC = np.meshgrid([3.5, 4.0, 5.2], [1e6, 5e6, 1.2e7])
+    # chemistry does not depend on pc, so the pc axis can be collapsed
+    for name, values in one_pc.properties(OF, PC).items():
+        np.testing.assert_allclose(values, full.properties(OF, PC)[name])
+        assert values.shape == OF.shape
+    for name, values in one_of.properties(OF, PC).items():
+        np.testing.assert_allclose(values, full.properties(4.0, PC)[name])
+    for name, values in point.properties(OF, PC).items():
+        np.testing.assert_allclose(values, full.properties(4.0, 5e6)[name])
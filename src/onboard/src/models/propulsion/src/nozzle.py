@@ -6,17 +6,75 @@ from . import theromochemical
 
 class Nozzle(object):
     g0 = 9.8
+    R = 8314.46 # Universal gas constant, J/(kmol K)
     
+    def evaluate(n, mdot, p1, p3, k, T0, m=None, out=None):
+        """
+        Array-native ideal nozzle. Inputs are broadcast against each other.
+
+        - input:
+            - mdot: mass flow (kg/s)
+            - p1: chamber pressure (Pa)
+            - p3: exit pressure (Pa)
+            - k: heat ratio
+            - T0: flame temperature (K)
+            - m: molecular weight (kg/kmol), defaults to theromochemical.m[0]
+            - out: tuple of 3 arrays
+                Buffers for F, v2 and isp. With them the call makes
+                no allocations the size of the batch.
+        
+        returns:
+            - F, v2, isp, mdot
+        """
+        if m is None:
+            m = theromochemical.m[0]
+        k = np.asarray(k, dtype=np.float64)
+        # terms of k alone are worked out at k's shape, often much smaller than the batch
+        exponent = (k - 1)/k
+        coef = 2*n.R*k/(k - 1)
+        if out is None:
+            shape = np.broadcast(mdot, p1, p3, k, T0, m).shape
+            out = (np.empty(shape), np.empty(shape), np.empty(shape))
+        F, v2, isp = out
+        np.divide(p3, p1, out=v2)
+        np.power(v2, exponent, out=v2)
+        np.subtract(1.0, v2, out=v2)
+        np.multiply(v2, T0, out=v2)
+        np.divide(v2, m, out=v2)
+        np.multiply(v2, coef, out=v2)
+        np.sqrt(v2, out=v2)
+        np.multiply(mdot, v2, out=F)
+        # F / (mdot * g0) without dividing by mdot
+        np.divide(v2, n.g0, out=isp)
+        return F, v2, isp, mdot
+
+    def evaluation_batch(n, columns, out=None):
+        """
+        Evaluate a whole batch of columnar inputs.
+
+        - input:
+            - columns: structured array or dict of arrays
+                Fields mdot, p1, p3, k, T0 and optionally m.
+            - out: see evaluate()
+        
+        returns:
+            - F, v2, isp, mdot arrays
+        """
+        names = columns.dtype.names if hasattr(columns, 'dtype') else columns
+        m = columns['m'] if 'm' in names else None
+        return n.evaluate(columns['mdot'], columns['p1'], columns['p3'], columns['k'],
+                          columns['T0'], m, out=out)
+
     def evaluation(n, input):
-        mdot = input['mdot']
-        OF = input['OF']
-        p1 = input['p1']
-        p2 = input['p3']
-        At = input['At']
-        k = input['k']
-        T0 = input['T0']
-        v2 = np.sqrt(2*k)
-        F = mdot * v2
-        isp = F / (mdot * n.g0)
+        """
+        Single-run wrapper around evaluate() taking the usual dict
+        (mdot, OF, p1, p3, At, k, T0 and optionally m). OF and At are
+        not needed by the ideal nozzle.
         
-        return F, v2, isp, mdot
\ No newline at end of file
+        returns:
+            - F, v2, isp, mdot. Floats when every input is a scalar.
+        """
+        F, v2, isp, mdot = n.evaluation_batch(input)
+        if np.ndim(F) == 0:
+            return float(F), float(v2), float(isp), mdot
+        return F, v2, isp, mdot
@@ -0,0 +1,149 @@
+"""
+sweep.py
+
+Design-space sweep over O/F x chamber pressure x expansion ratio.
+
+The grid axes are kept as broadcastable (n, 1, 1), (1, n, 1) and
+(1, 1, n) arrays, so the thermochemistry is looked up once per O/F and
+Nozzle.evaluation runs once over the whole grid.
+
+The injector is not swept: injector.evaluation depends only on its own
+parameters (Cd, rho), not on O/F, chamber pressure or expansion ratio,
+so it would be one constant copied to every grid point. Call it directly.
+"""
+import numpy as np
+from . import theromochemical
+from . import nozzle
+
+AXES = ('of', 'pc', 'eps')
+
+
+def area_ratio(M, k):
+    """
+    Nozzle area over throat area for an isentropic expansion to Mach M.
+    """
+    return (2 / (k + 1) * (1 + (k - 1) / 2 * M**2)) ** ((k + 1) / (2 * (k - 1))) / M
+
+
+def exit_mach(eps, k, iterations=60):
+    """
+    Supersonic exit Mach number for an area ratio.
+
+    Newton's method on log(area_ratio) - log(eps), kept inside a bracket
+    of the supersonic branch, where area_ratio rises monotonically: any
+    step that leaves the bracket is replaced by bisection.
+    """
+    eps, k = np.broadcast_arrays(np.asarray(eps, dtype=np.float64), np.asarray(k, dtype=np.float64))
+    a = (k + 1) / (2 * (k - 1))
+    # a sonic exit is pinned to M = 1
+    sonic = eps <= 1
+    target = np.log(np.maximum(eps, 1))
+    # area_ratio >= ((k - 1)/(k + 1))**a * M**(2a - 1), so the M where
+    # that bound reaches eps is already past the root
+    lo = np.ones_like(eps)
+    hi = 1 + np.exp((target - a * np.log((k - 1) / (k + 1))) / (2 * a - 1))
+    M = hi.copy()
+    for _ in range(iterations):
+        t = 2 / (k + 1) * (1 + (k - 1) / 2 * M**2)
+        f = a * np.log(t) - np.log(M) - target
+        df = 2 * a * (k - 1) / (k + 1) * M / t - 1 / M
+        lo = np.where(f < 0, M, lo)
+        hi = np.where(f > 0, M, hi)
+        step = M - f / df
+        M = np.where((step > lo) & (step < hi), step, (lo + hi) / 2)
+    return np.where(sonic, 1.0, M)
+
+
+def pressure_ratio(M, k):
+    """
+    Exit over chamber pressure for an isentropic expansion to Mach M.
+    """
+    return (1 + (k - 1) / 2 * M**2) ** (-k / (k - 1))
+
+
+class SweepResult(object):
+    """
+    Labeled result of a sweep.
+
+    - coords: dict of axis name -> 1D array, in AXES order
+    - data: dict of result name -> array of shape (len(of), len(pc), len(eps))
+    """
+    def __init__(self, coords, data):
+        self.coords = coords
+        self.data = data
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    @property
+    def shape(self):
+        return tuple(len(self.coords[a]) for a in AXES)
+
+    def sel(self, **point):
+        """
+        Results at the grid point closest to the given coordinates.
+        """
+        index = tuple(int(np.abs(self.coords[a] - point[a]).argmin()) if a in point else slice(None)
+                      for a in AXES)
+        return {name: value[index] for name, value in self.data.items()}
+
+    def argmax(self, name):
+        """
+        Coordinates of the best grid point for one result.
+        """
+        index = np.unravel_index(np.argmax(self.data[name]), self.shape)
+        return {a: self.coords[a][i] for a, i in zip(AXES, index)}
+
+
+def sweep(of=None, pc=None, eps=None, At=1e-3):
+    """
+    Evaluate the engine over every (O/F, chamber pressure, expansion ratio).
+
+    - input:
+        - of: 1D array
+            O/F ratios. Defaults to theromochemical.of.
+        - pc: 1D array
+            Chamber pressures in Pa.
+        - eps: 1D array
+            Nozzle area ratios Ae/At.
+        - At: float
+            Throat area in m^2.
+
+    returns:
+        - SweepResult with thrust, isp, mdot, v2 and pe
+    """
+    of = theromochemical.of if of is None else np.asarray(of, dtype=np.float64)
+    pc = np.linspace(1e6, 1e7, 10) if pc is None else np.asarray(pc, dtype=np.float64)
+    eps = np.linspace(2, 50, 25) if eps is None else np.asarray(eps, dtype=np.float64)
+    OF = of[:, None, None]
+    PC = pc[None, :, None]
+    EPS = eps[None, None, :]
+
+    props = theromochemical.properties(OF)
+    k = props['k']
+    # exit pressure depends on O/F (through k) and eps, not on pc
+    pe = PC * pressure_ratio(exit_mach(EPS, k), k)
+    mdot = PC * At / props['cs']
+
+    F, v2, isp, mdot = nozzle.Nozzle().evaluation({
+        'mdot': mdot,
+        'OF': OF,
+        'p1': PC,
+        'p3': pe,
+        'At': At,
+        'k': k,
+        'T0': props['T0'],
+        'm': props['m'],
+    })
+
+    shape = (len(of), len(pc), len(eps))
+    data = {
+        'thrust': F,
+        'isp': isp,
+        'mdot': mdot,
+        'v2': v2,
+        'pe': pe,
+    }
+    # results that do not vary along an axis are broadcast views, not copies
+    data = {name: np.broadcast_to(value, shape) for name, value in data.items()}
+    return SweepResult({'of': of, 'pc': pc, 'eps': eps}, data)
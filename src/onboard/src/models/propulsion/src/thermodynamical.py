@@ -1,17 +1,135 @@
 """
 thermodynamical.py
 """
+import hashlib
+import os
+
 import numpy as np
 from . import theromochemical
 
+PROPERTIES = ('k', 'm', 'cs', 'T0', 'viscosity', 'Pr')
+# in the user's cache, not the source tree, which may be read-only on the vehicle
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+                         'atlas')
+TABLE_PATH = os.path.join(CACHE_DIR, 'thermodynamical_table.npz')
+
+
+def chemistry(OF, pc):
+    """
+    Default property source: theromochemical's tables, which do not
+    depend on chamber pressure yet.
+    """
+    props = theromochemical.properties(OF)
+    shape = np.broadcast(OF, pc).shape
+    return {name: np.broadcast_to(props[name], shape) for name in PROPERTIES}
+
+
+def _bracket(grid, x):
+    # indices of the grid points on either side and the weight of the right one
+    if len(grid) == 1:
+        # nothing to interpolate along this axis
+        i = np.zeros(np.shape(x), dtype=np.intp)
+        return i, i, np.zeros(np.shape(x))
+    i = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+    w = (np.clip(x, grid[0], grid[-1]) - grid[i])/(grid[i + 1] - grid[i])
+    return i, i + 1, w
+
+
 class ThermoDynamical(object):
-    def __init__(t):
+    """
+    Combustion properties over O/F x chamber pressure, built on the
+    first lookup, saved as .npz and answered by bilinear interpolation.
+
+    - input:
+        - path: string
+            Where to keep the table. None keeps it in memory only.
+        - of, pc: 1D arrays
+            Table grid. Defaults to theromochemical.of and 1-20 MPa.
+        - source: function(OF, pc) -> dict
+            Computes the properties on the grid, e.g. an equilibrium
+            solver. Only called when the saved table is missing or stale.
+    """
+    def __init__(t, path=TABLE_PATH, of=None, pc=None, source=chemistry):
         # Constants
         t.C0 = 0.047
-        
+
         t.hv = 2.3 # Vaporization heat
-    
+
+        t.of = np.asarray(theromochemical.of if of is None else of, dtype=np.float64)
+        t.pc = np.asarray(np.linspace(1e6, 2e7, 20) if pc is None else pc, dtype=np.float64)
+        t.source = source
+        t.path = path
+        t._table = None
+
+    @property
+    def table(t):
+        if t._table is None:
+            t._table = t.load()
+        return t._table
+
+    def key(t):
+        """
+        Fingerprint of everything the table depends on.
+        """
+        digest = hashlib.sha1()
+        digest.update(t.of.tobytes())
+        digest.update(t.pc.tobytes())
+        digest.update(getattr(t.source, '__qualname__', repr(t.source)).encode())
+        if t.source is chemistry:
+            for name in PROPERTIES:
+                digest.update(np.asarray(theromochemical.TABLES[name], dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def build(t):
+        """
+        Evaluate the source on the grid.
+
+        returns:
+            - array of shape (len(PROPERTIES), len(of), len(pc))
+        """
+        props = t.source(t.of[:, None], t.pc[None, :])
+        return np.stack([np.broadcast_to(props[name], (len(t.of), len(t.pc)))
+                         for name in PROPERTIES])
+
+    def load(t):
+        key = t.key()
+        if t.path is not None and os.path.exists(t.path):
+            with np.load(t.path) as saved:
+                if str(saved['key']) == key:
+                    return saved['table']
+        table = t.build()
+        if t.path is not None:
+            os.makedirs(os.path.dirname(t.path) or '.', exist_ok=True)
+            tmp = t.path + '.tmp.npz'
+            np.savez(tmp, key=key, of=t.of, pc=t.pc, table=table)
+            os.replace(tmp, t.path)
+        return table
+
+    def properties(t, OF, pc):
+        """
+        Interpolated properties. OF and pc may be arrays of any
+        broadcastable shape, values outside the grid are clamped.
+
+        returns:
+            - dict of property name -> array
+        """
+        OF = np.asarray(OF, dtype=np.float64)
+        pc = np.asarray(pc, dtype=np.float64)
+        i0, i1, u = _bracket(t.of, OF)
+        j0, j1, v = _bracket(t.pc, pc)
+        tb = t.table
+        values = ((tb[:, i0, j0]*(1 - v) + tb[:, i0, j1]*v)*(1 - u) +
+                  (tb[:, i1, j0]*(1 - v) + tb[:, i1, j1]*v)*u)
+        return dict(zip(PROPERTIES, values))
+
     def evaluation(t, input):
-        thermo = {}
-        
-        return thermo
\ No newline at end of file
+        """
+        - input:
+            - dict with 'OF' and chamber pressure 'p1'
+
+        returns:
+            - dict of property name -> value
+        """
+        thermo = t.properties(input['OF'], input['p1'])
+
+        return thermo
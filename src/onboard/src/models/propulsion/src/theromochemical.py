@@ -2,7 +2,6 @@
 thermochemical.py
 """
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Pressure Average = 5%
 # Permissible Loss = 5%
@@ -43,4 +42,39 @@ Pr = np.array([
     .51
 ])
 
-plt.plot(of, Pr)
\ No newline at end of file
+TABLES = {
+    'k': k,
+    'm': m,
+    'cs': cs,
+    'T0': T0,
+    'viscosity': viscosity,
+    'Pr': Pr,
+}
+
+def properties(OF):
+    """
+    Combustion properties at any O/F.
+
+    Each table is spread evenly over the `of` range and linearly
+    interpolated, so a single-entry table is a constant.
+
+    - input:
+        - OF: float or array
+    
+    returns:
+        - dict of table name -> array shaped like OF
+    """
+    OF = np.asarray(OF, dtype=np.float64)
+    props = {}
+    for name, table in TABLES.items():
+        if len(table) == 1:
+            props[name] = np.broadcast_to(np.float64(table[0]), OF.shape)
+        else:
+            grid = np.linspace(of[0], of[-1], len(table))
+            props[name] = np.interp(OF, grid, table)
+    return props
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    plt.plot(of, properties(of)['Pr'])
+    plt.show()
\ No newline at end of file
@@ -26,15 +26,19 @@
 # SOFTWARE.
 #
 # @TODO(aaronhma): Create trajectory variables
-import tensorflow as tf
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../'))
+
+from shared import backend            # NumPy tensors, no TensorFlow needed
 from .common import format_helpers
 from .common import format
 
 TRAJECTORY = (0x60)
 DESTINATION = "Moon" # choose from moon, mars, etc.
-TRAJECTORY_X = tf.random.uniform((1,50))
-TRAJECTORY_Y = tf.random.uniform((1,50))
-TRAJECTORY_Z = tf.random.uniform((1,50))
+TRAJECTORY_X = backend.uniform((1,50))
+TRAJECTORY_Y = backend.uniform((1,50))
+TRAJECTORY_Z = backend.uniform((1,50))
 
 # @TODO(aaronhma): put all the trajectory and destinations into file: trajectory.txt
 
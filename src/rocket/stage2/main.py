@@ -25,13 +25,27 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 #
-REGISTER_STATUS = (0x60)
-REGISTER_ADDRESS = (0x00)
-REGISTER_PRESSURE = (0x01)
+from src import sensors
+from src.sensors import REGISTER_STATUS, REGISTER_ADDRESS, REGISTER_PRESSURE
 
-def get_atmosphere_temp():
-    # @TODO(aaronhma): Update
-    pass
+atmosphere = None # sensors.Poller, made on first use
+
+def get_atmosphere_temp(bus=None):
+    """
+    - input:
+        - bus: sensors bus
+            By default the simulated one, pass sensors.I2CBus(1)
+            on the flight computer.
+
+    - output:
+        - temperature in degrees C
+    """
+    global atmosphere
+    if atmosphere is None:
+        atmosphere = sensors.Poller(bus or sensors.simulated_atmosphere())
+    if not atmosphere.poll():
+        return None
+    return float(atmosphere.ring.latest()['temperature'][0])
 
 def test_camera():
     # @TODO(aaronhma): Update
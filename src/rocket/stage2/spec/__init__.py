@@ -1,3 +1 @@
-from . import test_camera
-
-test_camera.test_camera()
\ No newline at end of file
+from . import test_camera  # pytest runs it, it needs a camera
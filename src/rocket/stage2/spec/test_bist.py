@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.spec import bist
+
+
+def test_ring_wraps_and_reopens(tmp_path):
+    path = str(tmp_path/'bist.ring')
+    history = bist.History(path, capacity=8)
+    for i in range(20):
+        history.append(float(i), bist.check_id('add_3_7'), i % 3 != 0, 1e-6*i)
+    history.flush()
+    assert len(history) == 8
+    np.testing.assert_array_equal(history.latest()['time'], np.arange(12.0, 20.0))
+    np.testing.assert_array_equal(history.latest(3)['time'], [17.0, 18.0, 19.0])
+
+    # after a reboot the ring carries on where it stopped
+    reopened = bist.History(path, capacity=8)
+    assert reopened.written == 20
+    np.testing.assert_array_equal(reopened.latest(), history.latest())
+    reopened.append(20.0, bist.check_id('add_3_7'), True, 0.0)
+    np.testing.assert_array_equal(reopened.latest()['time'], np.arange(13.0, 21.0))
+
+    # another capacity is another file
+    assert len(bist.History(path, capacity=16)) == 0
+
+
+def test_results_follow_checks_across_reorders(tmp_path):
+    path = str(tmp_path/'bist.ring')
+    good = bist.Check('good', lambda: True)
+    bad = bist.Check('bad', lambda: False)
+    broken = bist.Check('broken', lambda: 1/0)
+    bist.Scheduler([good, bad], bist.History(path, capacity=64)).run_once()
+
+    # a new build runs the checks in another order, with one added
+    failed = []
+    scheduler = bist.Scheduler([broken, bad, good], bist.History(path, capacity=64),
+                               on_failure=lambda check, result: failed.append(check.name))
+    assert not scheduler.run_once()
+    assert failed == ['broken', 'bad']
+    stats = scheduler.stats()
+    assert stats['good']['runs'] == 2 and stats['good']['failures'] == 0
+    assert stats['bad']['runs'] == 2 and stats['bad']['failures'] == 2
+    assert stats['broken']['runs'] == 1 and stats['broken']['failures'] == 1
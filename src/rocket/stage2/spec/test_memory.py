@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from src import memory
+
+BLOCK = memory.BLOCK_SIZE
+
+
+def test_budget():
+    arena = memory.Arena(64*BLOCK, budgets={'camera': 3*BLOCK})
+    frame = arena.allocate('camera', (2*BLOCK,), np.uint8)
+    arena.allocate('camera', (BLOCK // 8,))          # float64, one block
+    with pytest.raises(memory.MemoryOverload) as err:
+        arena.allocate('camera', (1,), np.uint8)
+    assert err.value.subsystem == 'camera'
+    assert err.value.available == 0
+    # a failed allocation takes nothing
+    assert arena.in_use['camera'] == 3*BLOCK
+    assert arena.used == 3*BLOCK
+    # other subsystems are not held to it
+    arena.allocate('guidance', (10*BLOCK,), np.uint8)
+    frame.release()
+    arena.allocate('camera', (BLOCK,), np.uint8)
+
+
+def test_overload_without_contiguous_space():
+    arena = memory.Arena(4*BLOCK)
+    buffers = [arena.allocate('bist', (BLOCK,), np.uint8) for _ in range(4)]
+    with pytest.raises(memory.MemoryOverload):
+        arena.allocate('bist', (1,), np.uint8)
+    buffers[0].release()
+    buffers[2].release()
+    # two blocks free, but not next to each other
+    with pytest.raises(memory.MemoryOverload) as err:
+        arena.allocate('bist', (2*BLOCK,), np.uint8)
+    assert err.value.available == 2*BLOCK
+
+
+def test_first_fit_reuse():
+    arena = memory.Arena(16*BLOCK)
+    a = arena.allocate('a', (2*BLOCK,), np.uint8)
+    b = arena.allocate('b', (BLOCK,), np.uint8)
+    assert (a.start, b.start) == (0, 2)
+    a.array[:] = 7
+    a.release()
+    c = arena.allocate('c', (BLOCK,), np.uint8)
+    d = arena.allocate('d', (BLOCK,), np.uint8)
+    e = arena.allocate('e', (BLOCK,), np.uint8)
+    assert (c.start, d.start, e.start) == (0, 1, 3)
+    # reused blocks come back zeroed
+    assert not c.array.any() and not d.array.any()
+    with arena.allocate('f', (3, 5), np.float32) as view:
+        assert view.shape == (3, 5) and view.dtype == np.float32
+        assert np.shares_memory(view, arena.memory)
+    assert arena.allocate('g', (1,)).start == 4
+
+
+def test_high_water():
+    arena = memory.Arena(16*BLOCK, budgets={'trajectory': 8*BLOCK})
+    first = arena.allocate('trajectory', (3*BLOCK,), np.uint8)
+    second = arena.allocate('trajectory', (2*BLOCK,), np.uint8)
+    first.release()
+    arena.allocate('trajectory', (BLOCK,), np.uint8)
+    second.release()
+    report = arena.report()['subsystems']['trajectory']
+    assert report == {"in_use": BLOCK, "high_water": 5*BLOCK, "allocations": 3,
+                      "budget": 8*BLOCK}
+    arena.release_all()
+    assert arena.used == 0
+    assert arena.report()['subsystems']['trajectory']['high_water'] == 5*BLOCK
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='needs /proc')
+def test_pages_resident():
+    def resident():
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+    before = resident()
+    arena = memory.Arena(32*1024*1024)
+    assert resident() - before >= 0.9*arena.capacity
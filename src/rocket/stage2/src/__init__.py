@@ -2,38 +2,42 @@
 from . import config
 from . import camera
 from . import service_worker
-from .spec import * as spec
-from .trajectory import * as tj
-from .rocket_control import * as rc
-from .rocket_manuevers import * as rm
-from errors.src import MemoryOverload, OtherError, SensorOverload
+from . import memory
+from . import spec
+from . import rocket_control as rc
+from . import rocket_manuevers as rm
+from .errors.src import MemoryOverload, OtherError, SensorOverload
 
 # 🎖 @TODO(aaronhma): Step 2: Declare everything
-ram = [] # Memory storage
+ram = memory.arena() # Memory storage, see memory.py
 
 # 🎖 @TODO(aaronhma): Step 3: Enable camera
-camera.camera(mirror_status=True)
+if camera.cv2 is not None: # Boxes without OpenCV have no camera to open
+    camera.camera(mirror_status=True)
 
 # 🎖 @TODO(aaronhma): Step 4: Setup
-spec.bit_test.test()
+spec.test_radiation.test()
+bist = spec.bist.Scheduler(spec.bist.battery(ram)).start() # Keep checking in the background
 
 # @TODO(aaronhma): Step 5: Calc trajectory
-tj.__TODO__
+# from . import trajectory as tj # trajectory_calc does not run yet
+# tj.__TODO__
 
 # @TODO(aaronhma): Step 6: Fire rockets
-rc.__TODO__
+# rc.__TODO__
 
 # @TODO(aaronhma): Step 7: Alpha
-rc.__TODO__
+# rc.__TODO__
 
 # @TODO(aaronhma): Step 8: Burnout
-rc.__TODO__
+# rc.__TODO__
 
 # @TODO(aaronhma): Step 9: Disable 2nd stage
-rm.__TODO__
+# rm.__TODO__
 
 # @TODO(aaronhma): Step 10: Remove 2nd stage
-rm.__TODO__
+# rm.__TODO__
 
 # 🎖 @TODO(aaronhma): Step 11: Delete 2nd stage RAM
-del ram
\ No newline at end of file
+bist.stop()
+rm.destroy_ram.destroy_ram(ram)
@@ -21,41 +21,73 @@ This file only works on a RPi 3 B+ and RPi 2 B+.
 # Priority Low: @TODO(rohan): Make it compatible with Raspberry Pi 0 W
 # Priority High: @TODO(aaronhma): Make it compatible for new Raspberry Pi 4 on rocket
 
-import cv2                              # Import cv2 library
+try:
+    import cv2                          # Import cv2 library
+except ImportError:                     # Headless boxes without OpenCV
+    cv2 = None
+from . import capture                   # Threaded frame capture
+from . import recorder                  # Segmented flight recording
 
-def retrieve_webcam(mirror=False):      # Camera function
+def retrieve_webcam(mirror=False, headless=False, source=None, frames=None, record=None):  # Camera function
     """
     - input:
         - mirror: boolean
             By default False, but when True,
             mirror is enabled.
+        - headless: boolean
+            Don't open a window, just consume frames.
+        - source: capture source
+            By default camera 0, pass capture.SyntheticSource()
+            to run without a camera.
+        - frames: int
+            Stop after this many frames, by default run until ESC.
+        - record: string
+            Directory to record the flight video to, by default
+            nothing is recorded.
+    
+    - output:
+        - number of frames shown
     """
+    if not headless and cv2 is None:     # The window needs OpenCV
+        raise ImportError("OpenCV is needed to show the camera, pass headless=True")
     # problem for pi 4 and 0:
-    cam = cv2.VideoCapture(0)            # Create Camera Window
-    while True:                          # While the function is called
-        ret_val, img = cam.read()        # Read the current camera
-        if mirror:                       # If mirror is true:
-            img = cv2.flip(img, 1)       # Create a mirrored experience
-        else:                            # Anything else
-            pass                         # Anything else, ignore
+    if source is None:                   # Default to the real camera
+        source = capture.CameraSource(0)
+    cam = capture.Capture(source, mirror=mirror).start()  # Frames are read on their own thread
+    rec = recorder.Recorder(cam, record).start() if record else None  # Encodes on its own threads
+    seq = shown = 0
+    while frames is None or shown < frames:  # While the function is called
+        seq, _, img = cam.latest(after=seq, timeout=1.0)  # Newest frame, no copy
+        if img is None:                  # Camera stopped sending
+            break
+        shown += 1
+        if headless:                     # Nothing to draw
+            continue
         cv2.imshow('Stage 2 LIVE!', img) # Show the title in window
         if cv2.waitKey(1) == 27:         # Wait until key 27 is pressed
             break                        # Press ESC (key 27) to quit
-        else:                            # Anything else
-            pass                         # Anything else, ignore 
     
-    cv2.destroyAllWindows()              # Close Camera Window
+    if rec is not None:
+        rec.stop()                       # Flush the last segment and index
+    cam.stop()                           # Stop the capture thread
+    if not headless:
+        cv2.destroyAllWindows()          # Close Camera Window
+    return shown
 
-def camera(mirror_status):               # Camera utility wizard function
+def camera(mirror_status, headless=False, record=None):  # Camera utility wizard function
     """
     - input:
         - mirror_status: boolean
             Takes in a boolean and if True, enable mirror,
             anything else will disable mirror.
+        - headless: boolean
+            Run without a window.
+        - record: string
+            Directory to record the flight video to.
     
     - output:
         - retrieve_webcam() Camera Window
     """
-    retrieve_webcam(mirror=mirror_status) # Call the retrieve_webcam() function with the mirror_status boolean value
+    retrieve_webcam(mirror=mirror_status, headless=headless, record=record) # Call the retrieve_webcam() function with the mirror_status boolean value
     
 # exports camera
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+       _______ _                _____
+    /\|__   __| |        /\    / ____|
+   /  \  | |  | |       /  \  | (___
+  / /\ \ | |  | |      / /\ \  \___ \
+ / ____ \| |  | |____ / ____ \ ____) |
+/_/    \_\_|  |______/_/    \_\_____/
+
+This file is part of Atlas and Firebolt Space Agency.
+
+Licensed under the MIT License
+
+Threaded frame capture for Stage 2.
+
+A producer thread reads frames straight into a ring of preallocated
+buffers. Consumers get read-only views of the newest frame, nothing is
+copied. Benchmark without a camera:
+
+    python capture.py --synthetic --seconds 5
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:                     # Headless boxes without OpenCV
+    cv2 = None
+
+
+class FrameRing(object):
+    """
+    Fixed ring of preallocated frames.
+
+    - input:
+        - slots: int
+            Number of frames kept. A consumer holding a frame has
+            slots - 1 newer frames of time before it is overwritten.
+        - shape: tuple
+        - dtype: numpy dtype
+    """
+    def __init__(self, slots, shape, dtype=np.uint8):
+        if slots < 2:
+            raise ValueError("A FrameRing needs at least 2 slots")
+        self.slots = slots
+        self.frames = np.empty((slots,) + tuple(shape), dtype=dtype)
+        self.times = np.zeros(slots)
+        self.written = 0                # sequence number of the newest frame
+        self._cond = threading.Condition()
+
+    def next_slot(self):
+        """
+        Buffer the producer should fill next.
+        """
+        return self.frames[(self.written + 1) % self.slots]
+
+    def publish(self, timestamp):
+        with self._cond:
+            self.written += 1
+            self.times[self.written % self.slots] = timestamp
+            self._cond.notify_all()
+
+    def valid(self, seq):
+        """
+        True while frame `seq` has not been overwritten.
+        """
+        # the producer may already be filling frame written + 1
+        return self.written - self.slots + 2 <= seq <= self.written
+
+    def frame(self, seq):
+        view = self.frames[seq % self.slots]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, after=0, timeout=None):
+        """
+        Newest frame, waiting until there is one newer than `after`.
+
+        returns:
+            - (seq, timestamp, read-only view), or (0, 0.0, None) on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.written > after, timeout):
+                return 0, 0.0, None
+            seq = self.written
+        return seq, self.times[seq % self.slots], self.frame(seq)
+
+
+class CameraSource(object):
+    """
+    OpenCV camera that decodes straight into the buffer it is given.
+    """
+    def __init__(self, index=0):
+        if cv2 is None:
+            raise IOError("Couldn't open camera {}, OpenCV is not installed".format(index))
+        self.cam = cv2.VideoCapture(index)
+        ok, frame = self.cam.read()
+        if not ok:
+            raise IOError("Couldn't read from camera {}".format(index))
+        self.shape = frame.shape
+        self.dtype = frame.dtype
+
+    def read(self, buf):
+        ok, _ = self.cam.read(buf)
+        return ok
+
+    def close(self):
+        self.cam.release()
+
+
+class SyntheticSource(object):
+    """
+    Moving gradient frames, for running without a camera.
+
+    - input:
+        - shape: tuple
+        - fps: float
+            Frames per second to pace at, None for as fast as possible.
+    """
+    def __init__(self, shape=(480, 640, 3), fps=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(np.uint8)
+        self.period = 1.0/fps if fps else 0.0
+        self._base = np.indices(self.shape[:2]).sum(axis=0).astype(np.uint8)
+        if len(self.shape) == 3:
+            self._base = np.repeat(self._base[:, :, None], self.shape[2], axis=2)
+        self._count = 0
+        self._next = time.monotonic()
+
+    def read(self, buf):
+        if self.period:
+            self._next += self.period
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._count += 1
+        np.add(self._base, self._count % 256, out=buf, casting='unsafe')
+        return True
+
+    def close(self):
+        pass
+
+
+def mirror_into(src, dst):
+    """
+    Horizontal flip of src written into dst, no new image is made.
+    """
+    if cv2 is not None:
+        cv2.flip(src, 1, dst=dst)
+    else:
+        np.copyto(dst, src[:, ::-1])
+
+
+class Capture(object):
+    """
+    Producer thread filling a FrameRing from a source.
+
+    - input:
+        - source: CameraSource, SyntheticSource or anything with
+          shape, dtype and read(buf)
+        - slots: int
+        - mirror: boolean
+            Flip every frame horizontally.
+    """
+    def __init__(self, source, slots=4, mirror=False):
+        self.source = source
+        self.ring = FrameRing(slots, source.shape, source.dtype)
+        self.mirror = mirror
+        # the camera decodes here first when mirroring, then flips into the ring
+        self._scratch = np.empty(source.shape, dtype=source.dtype) if mirror else None
+        self.frames = 0
+        self.failures = 0
+        # frames are stamped in Unix time like telemetry and the BIST history,
+        # but advanced by the monotonic clock so a clock step never reorders them
+        self.epoch = time.time() - time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stage2-capture', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.source.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            slot = self.ring.next_slot()
+            if self.mirror:
+                ok = self.source.read(self._scratch)
+                if ok:
+                    mirror_into(self._scratch, slot)
+            else:
+                ok = self.source.read(slot)
+            if not ok:
+                self.failures += 1
+                continue
+            self.frames += 1
+            self.ring.publish(time.monotonic() + self.epoch)
+
+    def latest(self, after=0, timeout=None):
+        return self.ring.latest(after, timeout)
+
+
+def benchmark(capture, seconds=5.0):
+    """
+    Consume frames for `seconds` and report producer and consumer rates.
+    """
+    capture.start()
+    start = time.monotonic()
+    seq = seen = skipped = 0
+    while time.monotonic() - start < seconds:
+        new, _, frame = capture.latest(after=seq, timeout=1.0)
+        if frame is None:
+            continue
+        skipped += new - seq - 1 if seq else 0
+        seq = new
+        seen += 1
+    elapsed = time.monotonic() - start
+    capture.stop()
+    return {
+        "produced_fps": capture.frames/elapsed,
+        "consumed_fps": seen/elapsed,
+        "skipped": skipped,
+        "failures": capture.failures,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stage 2 capture benchmark')
+    parser.add_argument('--synthetic', action='store_true', help='Use generated frames')
+    parser.add_argument('--mirror', action='store_true')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    source = SyntheticSource() if args.synthetic else CameraSource()
+    print(benchmark(Capture(source, mirror=args.mirror), args.seconds))
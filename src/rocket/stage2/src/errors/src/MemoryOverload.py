@@ -1,5 +1,26 @@
+class MemoryOverload(MemoryError):
+    """
+    The memory is overloaded, see errors/schema/MemoryOverload.md.
+
+    Raised before an allocation would take a subsystem past its budget
+    or the arena past its capacity, so the flight computer never gets
+    to run out of RAM.
+
+    - subsystem: string
+    - requested: int, bytes asked for
+    - available: int, bytes that were left
+    """
+    def __init__(self, subsystem, requested, available, message=None):
+        self.subsystem = subsystem
+        self.requested = requested
+        self.available = available
+        super(MemoryOverload, self).__init__(message or
+            "{} asked for {} bytes, {} available".format(subsystem, requested, available))
+
 def init():
     # @TODO(aaronhma): UPDATE
+    pass
 
 def catchErrors():
-    # @TODO(aaronhma): UPDATE
\ No newline at end of file
+    # @TODO(aaronhma): UPDATE
+    pass
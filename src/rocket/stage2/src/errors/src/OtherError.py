@@ -1,5 +1,7 @@
 def init():
     # @TODO(aaronhma): UPDATE
+    pass
 
 def catchErrors():
-    # @TODO(aaronhma): UPDATE
\ No newline at end of file
+    # @TODO(aaronhma): UPDATE
+    pass
@@ -1,6 +1,6 @@
 from . import OtherError as err
 from . import MemoryOverload as ram_err
-from . import SensoryOverload as sensor_err
+from . import SensorOverload as sensor_err
 
 # @TODO(aaronhma): Setup
 err.init()
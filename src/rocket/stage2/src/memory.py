@@ -0,0 +1,175 @@
+"""
+       _______ _                _____
+    /\|__   __| |        /\    / ____|
+   /  \  | |  | |       /  \  | (___
+  / /\ \ | |  | |      / /\ \  \___ \
+ / ____ \| |  | |____ / ____ \ ____) |
+/_/    \_\_|  |______/_/    \_\_____/
+
+This file is part of Atlas and Firebolt Space Agency.
+
+Licensed under the MIT License
+
+Stage 2 memory budget.
+
+All of Stage 2's working buffers come out of one arena allocated at
+startup, in fixed-size blocks. Subsystems get typed NumPy views into
+it, may be given a budget, and have their high-water mark tracked.
+Asking for more than is left raises MemoryOverload instead of letting
+the flight computer run out of RAM. The arena's pages are written when
+it is created, so the whole budget is resident from startup rather
+than faulted in by the first subsystem to touch it.
+"""
+import threading
+
+import numpy as np
+
+try:
+    from .errors.src.MemoryOverload import MemoryOverload
+except ImportError:                     # Run as a script
+    from errors.src.MemoryOverload import MemoryOverload
+
+STAGE2_BUDGET = 64*1024*1024            # bytes
+BLOCK_SIZE = 4096
+
+
+class Buffer(object):
+    """
+    A typed view into the arena. Give it back with release(), or use it
+    as a context manager.
+    """
+    def __init__(self, arena, subsystem, start, blocks, array):
+        self.arena = arena
+        self.subsystem = subsystem
+        self.start = start
+        self.blocks = blocks
+        self.array = array
+
+    @property
+    def nbytes(self):
+        return self.blocks*self.arena.block_size
+
+    def release(self):
+        if self.array is not None:
+            self.arena._free(self)
+            self.array = None
+
+    def __enter__(self):
+        return self.array
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class Arena(object):
+    """
+    Preallocated memory handed out in blocks.
+
+    - input:
+        - capacity: int
+            Bytes allocated up front.
+        - block_size: int
+            Allocation granularity in bytes.
+        - budgets: dict
+            Optional subsystem -> most bytes it may hold at once.
+    """
+    def __init__(self, capacity=STAGE2_BUDGET, block_size=BLOCK_SIZE, budgets=None):
+        self.block_size = block_size
+        self.blocks = capacity // block_size
+        self.capacity = self.blocks*block_size
+        # np.zeros gets untouched pages from calloc, which the kernel only
+        # backs on first write: write every page now
+        self.memory = np.empty(self.capacity, dtype=np.uint8)
+        self.memory.fill(0)
+        self.free = np.ones(self.blocks, dtype=bool)
+        self.budgets = dict(budgets or {})
+        self.in_use = {}
+        self.high_water = {}
+        self.allocations = {}
+        self.buffers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def used(self):
+        return (self.blocks - int(self.free.sum()))*self.block_size
+
+    def _find(self, n):
+        # first run of n free blocks
+        if n == 1:
+            idx = np.flatnonzero(self.free)
+            return int(idx[0]) if len(idx) else None
+        edges = np.diff(np.concatenate(([0], self.free.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        fits = np.flatnonzero(ends - starts >= n)
+        return int(starts[fits[0]]) if len(fits) else None
+
+    def allocate(self, subsystem, shape, dtype=np.float64):
+        """
+        A zeroed array of `shape` and `dtype` backed by the arena.
+
+        returns:
+            - Buffer, its .array is the view
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape))*dtype.itemsize
+        n = max(-(-nbytes // self.block_size), 1)
+        with self._lock:
+            held = self.in_use.get(subsystem, 0)
+            budget = self.budgets.get(subsystem)
+            if budget is not None and held + n*self.block_size > budget:
+                raise MemoryOverload(subsystem, nbytes, budget - held,
+                                     "{} is over its {} byte budget".format(subsystem, budget))
+            start = self._find(n)
+            if start is None:
+                raise MemoryOverload(subsystem, nbytes, self.capacity - self.used)
+            self.free[start:start + n] = False
+            held += n*self.block_size
+            self.in_use[subsystem] = held
+            self.high_water[subsystem] = max(self.high_water.get(subsystem, 0), held)
+            self.allocations[subsystem] = self.allocations.get(subsystem, 0) + 1
+        offset = start*self.block_size
+        raw = self.memory[offset:offset + nbytes]
+        raw[:] = 0
+        buf = Buffer(self, subsystem, start, n, raw.view(dtype).reshape(shape))
+        with self._lock:
+            self.buffers.add(buf)
+        return buf
+
+    def _free(self, buf):
+        with self._lock:
+            self.free[buf.start:buf.start + buf.blocks] = True
+            self.in_use[buf.subsystem] -= buf.blocks*self.block_size
+            self.buffers.discard(buf)
+
+    def release_subsystem(self, subsystem):
+        for buf in [b for b in self.buffers if b.subsystem == subsystem]:
+            buf.release()
+
+    def release_all(self):
+        for buf in list(self.buffers):
+            buf.release()
+
+    def report(self):
+        return {
+            "capacity": self.capacity,
+            "used": self.used,
+            "subsystems": {name: {"in_use": self.in_use[name],
+                                  "high_water": self.high_water[name],
+                                  "allocations": self.allocations[name],
+                                  "budget": self.budgets.get(name)}
+                           for name in self.in_use},
+        }
+
+
+_arena = None
+
+
+def arena():
+    """
+    The Stage 2 arena, allocated on first use.
+    """
+    global _arena
+    if _arena is None:
+        _arena = Arena()
+    return _arena
@@ -0,0 +1,279 @@
+"""
+       _______ _                _____
+    /\|__   __| |        /\    / ____|
+   /  \  | |  | |       /  \  | (___
+  / /\ \ | |  | |      / /\ \  \___ \
+ / ____ \| |  | |____ / ____ \ ____) |
+/_/    \_\_|  |______/_/    \_\_____/
+
+This file is part of Atlas and Firebolt Space Agency.
+
+Licensed under the MIT License
+
+On-board video recorder for Stage 2.
+
+Frames from a capture.Capture are copied into a small pool of buffers,
+encoded on a worker pool and written in order to fixed-duration
+segment files:
+
+    index.json            one entry per segment: file, start, end, frames
+    segment-000000.bin    frames, each a FRAME header then the payload
+    segment-000000.idx    (timestamp, offset) of every frame in the segment
+
+Timestamps are Unix time, as in the telemetry log, so frames line up
+with flight data and across reboots. A reader only needs index.json
+and one .idx to seek to a timestamp.
+The capture loop is never blocked: when every buffer is busy the frame
+is dropped and counted. Try it without a camera:
+
+    python recorder.py --synthetic --seconds 5 --out /tmp/flight
+"""
+import argparse
+import bisect
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from . import capture
+except ImportError:                     # Run as a script
+    import capture
+
+try:
+    import cv2
+except ImportError:                     # Headless boxes without OpenCV
+    cv2 = None
+
+FRAME = struct.Struct('<dI')            # timestamp, payload length
+ENTRY = np.dtype([('time', '<f8'), ('offset', '<u8')])
+
+
+def encode_jpeg(frame, quality=80):
+    ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return data.tobytes()
+
+
+def encode_zlib(frame):
+    return zlib.compress(frame.tobytes(), 1)
+
+
+CODECS = {
+    'jpeg': encode_jpeg,
+    'zlib': encode_zlib,
+}
+
+
+def decode(codec, data, shape, dtype):
+    if codec == 'jpeg':
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    return np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape)
+
+
+class Recorder(object):
+    """
+    Record frames from a capture without stalling it.
+
+    - input:
+        - capture: capture.Capture
+        - directory: string
+        - segment_seconds: float
+            Length of every segment file.
+        - workers: int
+            Encoder threads. cv2 and zlib release the GIL while encoding.
+        - queue_depth: int
+            Frames that can be waiting to be encoded or written.
+        - codec: string
+            'jpeg' (needs OpenCV) or 'zlib'. Defaults to jpeg when
+            OpenCV is installed.
+    """
+    def __init__(self, capture, directory, segment_seconds=10.0, workers=2, queue_depth=8,
+                 codec=None):
+        self.capture = capture
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.codec = codec or ('jpeg' if cv2 is not None else 'zlib')
+        self.encode = CODECS[self.codec]
+        os.makedirs(directory, exist_ok=True)
+
+        ring = capture.ring
+        self._free = queue.Queue()
+        for _ in range(queue_depth):
+            self._free.put(np.empty(ring.frames.shape[1:], dtype=ring.frames.dtype))
+        self._pending = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+        self.max_queue_depth = 0
+        self.segments = []
+
+        self._stop = threading.Event()
+        self._pump = threading.Thread(target=self._pump_frames, name='stage2-recorder', daemon=True)
+        self._writer = threading.Thread(target=self._write_frames, name='stage2-writer', daemon=True)
+        self._segment = None
+
+    @property
+    def queue_depth(self):
+        return self._pending.qsize()
+
+    def stats(self):
+        return {
+            "frames_recorded": self.frames_recorded,
+            "frames_dropped": self.frames_dropped,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "segments": len(self.segments),
+        }
+
+    def start(self):
+        self._pump.start()
+        self._writer.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._pump.join()
+        self._pending.put(None)
+        self._writer.join()
+        self._pool.shutdown()
+
+    def _pump_frames(self):
+        ring = self.capture.ring
+        seq = 0
+        while not self._stop.is_set():
+            new, timestamp, frame = ring.latest(after=seq, timeout=0.1)
+            if frame is None:
+                continue
+            if seq:
+                # frames the ring moved past before we got to them
+                self.frames_dropped += new - seq - 1
+            seq = new
+            try:
+                buf = self._free.get_nowait()
+            except queue.Empty:
+                self.frames_dropped += 1
+                continue
+            np.copyto(buf, frame)
+            if not ring.valid(seq):
+                # overwritten while copying
+                self._free.put(buf)
+                self.frames_dropped += 1
+                continue
+            self._pending.put((timestamp, buf, self._pool.submit(self.encode, buf)))
+            self.max_queue_depth = max(self.max_queue_depth, self._pending.qsize())
+
+    def _write_frames(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            timestamp, buf, future = item
+            data = future.result()
+            self._free.put(buf)
+            self._write(timestamp, data)
+            self.frames_recorded += 1
+        self._close_segment()
+
+    def _write(self, timestamp, data):
+        seg = self._segment
+        if seg is None or timestamp >= seg['start'] + self.segment_seconds:
+            self._close_segment()
+            seg = self._open_segment(timestamp)
+        seg['entries'].append((timestamp, seg['file'].tell()))
+        seg['file'].write(FRAME.pack(timestamp, len(data)))
+        seg['file'].write(data)
+        seg['end'] = timestamp
+
+    def _open_segment(self, timestamp):
+        name = 'segment-{:06d}'.format(len(self.segments))
+        self._segment = {
+            'name': name,
+            'start': timestamp,
+            'end': timestamp,
+            'file': open(os.path.join(self.directory, name + '.bin'), 'wb'),
+            'entries': [],
+        }
+        return self._segment
+
+    def _close_segment(self):
+        seg = self._segment
+        if seg is None:
+            return
+        seg['file'].close()
+        np.array(seg['entries'], dtype=ENTRY).tofile(os.path.join(self.directory, seg['name'] + '.idx'))
+        self.segments.append({
+            'file': seg['name'],
+            'start': seg['start'],
+            'end': seg['end'],
+            'frames': len(seg['entries']),
+        })
+        self._segment = None
+        ring = self.capture.ring
+        index = {
+            'codec': self.codec,
+            'shape': list(ring.frames.shape[1:]),
+            'dtype': ring.frames.dtype.str,
+            'segment_seconds': self.segment_seconds,
+            'segments': self.segments,
+        }
+        tmp = os.path.join(self.directory, 'index.json.tmp')
+        with open(tmp, 'w') as file:
+            json.dump(index, file)
+        os.replace(tmp, os.path.join(self.directory, 'index.json'))
+
+
+class Recording(object):
+    """
+    Post-flight access to a recording directory.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json')) as file:
+            self.index = json.load(file)
+        self.segments = self.index['segments']
+        self._starts = [s['start'] for s in self.segments]
+
+    def frame_at(self, timestamp):
+        """
+        The last frame recorded at or before `timestamp`.
+
+        returns:
+            - (frame timestamp, frame array)
+        """
+        i = max(bisect.bisect_right(self._starts, timestamp) - 1, 0)
+        seg = self.segments[i]
+        entries = np.fromfile(os.path.join(self.directory, seg['file'] + '.idx'), dtype=ENTRY)
+        j = max(int(np.searchsorted(entries['time'], timestamp, side='right')) - 1, 0)
+        with open(os.path.join(self.directory, seg['file'] + '.bin'), 'rb') as file:
+            file.seek(int(entries['offset'][j]))
+            t, length = FRAME.unpack(file.read(FRAME.size))
+            data = file.read(length)
+        frame = decode(self.index['codec'], data, tuple(self.index['shape']),
+                       np.dtype(self.index['dtype']))
+        return t, frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stage 2 recorder')
+    parser.add_argument('--synthetic', action='store_true', help='Use generated frames')
+    parser.add_argument('--fps', type=float, default=30.0, help='Synthetic frame rate')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--segment', type=float, default=1.0, help='Segment length in seconds')
+    parser.add_argument('--out', default='recording')
+    args = parser.parse_args()
+    source = capture.SyntheticSource(fps=args.fps) if args.synthetic else capture.CameraSource()
+    cam = capture.Capture(source).start()
+    rec = Recorder(cam, args.out, segment_seconds=args.segment).start()
+    time.sleep(args.seconds)
+    rec.stop()
+    cam.stop()
+    print(rec.stats())
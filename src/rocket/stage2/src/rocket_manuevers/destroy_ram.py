@@ -1,4 +1,14 @@
-# @TODO(aaronhma): UPDATE import
-from ..spec import spec_ram
+from .. import memory
 
-del spec_ram
\ No newline at end of file
+
+def destroy_ram(arena=None):
+    """
+    Give back every Stage 2 buffer, e.g. before the stage is dropped.
+
+    returns:
+        - the arena report from just before, high-water marks included
+    """
+    arena = arena or memory.arena()
+    report = arena.report()
+    arena.release_all()
+    return report
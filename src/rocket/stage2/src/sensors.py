@@ -0,0 +1,269 @@
+"""
+       _______ _                _____
+    /\|__   __| |        /\    / ____|
+   /  \  | |  | |       /  \  | (___
+  / /\ \ | |  | |      / /\ \  \___ \
+ / ____ \| |  | |____ / ____ \ ____) |
+/_/    \_\_|  |______/_/    \_\_____/
+
+This file is part of Atlas and Firebolt Space Agency.
+
+Licensed under the MIT License
+
+Sensor register polling for Stage 2.
+
+Every cycle reads a device's whole register block in one bus transfer
+into a reused buffer, decodes it with a precompiled struct.Struct and
+stores the sample in a preallocated ring. Try it without hardware:
+
+    python sensors.py --rate 1000 --seconds 2
+"""
+import argparse
+import struct
+import time
+
+import numpy as np
+
+try:
+    from smbus2 import SMBus, i2c_msg
+except ImportError:                     # Only on the flight computer
+    SMBus = None
+
+# Atmosphere sensor register map, see stage2/main.py
+REGISTER_STATUS = (0x60)                # value of the status register when healthy
+REGISTER_ADDRESS = (0x00)               # first register of the block
+REGISTER_PRESSURE = (0x01)
+ATMOSPHERE_ADDRESS = 0x76               # I2C address
+
+
+class Layout(object):
+    """
+    A block of consecutive registers and how to decode it.
+
+    - input:
+        - start: int
+            First register.
+        - fmt: string
+            struct format of the whole block.
+        - fields: tuple of string
+            Name of every value in fmt.
+        - scale: dict
+            Optional field -> factor applied after decoding.
+    """
+    def __init__(self, start, fmt, fields, scale=None):
+        self.start = start
+        self.struct = struct.Struct(fmt)
+        self.fields = tuple(fields)
+        self.size = self.struct.size
+        self.scale = scale or {}
+
+
+# status (0x00), pressure in Pa (0x01 - 0x04), temperature in centi-degrees C (0x05 - 0x06)
+ATMOSPHERE = Layout(REGISTER_ADDRESS, '>BIh', ('status', 'pressure', 'temperature'),
+                    scale={'temperature': 0.01})
+
+
+class SimulatedBus(object):
+    """
+    In-memory register file per device address, for tests and ground runs.
+
+    - input:
+        - update: function(bus, address)
+            Called before every read, e.g. to move the simulated values.
+    """
+    def __init__(self, update=None):
+        self.registers = {}
+        self.update = update
+        self.transfers = 0
+
+    def write(self, address, register, data):
+        mem = self.registers.setdefault(address, bytearray(256))
+        mem[register:register + len(data)] = data
+
+    def readinto(self, address, register, buf):
+        if self.update is not None:
+            self.update(self, address)
+        mem = self.registers[address]
+        buf[:] = mem[register:register + len(buf)]
+        self.transfers += 1
+
+    def close(self):
+        pass
+
+
+def simulated_atmosphere(start=None):
+    """
+    SimulatedBus with an atmosphere sensor that climbs as time passes.
+    """
+    t0 = time.monotonic() if start is None else start
+
+    def update(bus, address):
+        t = time.monotonic() - t0
+        altitude = 50.0*t
+        pressure = 101325.0*(1 - 2.25577e-5*min(altitude, 40000))**5.25588
+        temperature = 15.0 - 0.0065*min(altitude, 11000)
+        bus.write(address, REGISTER_ADDRESS,
+                  ATMOSPHERE.struct.pack(REGISTER_STATUS, int(pressure), int(temperature*100)))
+
+    bus = SimulatedBus(update)
+    update(bus, ATMOSPHERE_ADDRESS)
+    return bus
+
+
+class I2CBus(object):
+    """
+    Linux I2C through smbus2, one combined write/read transfer per block.
+    """
+    def __init__(self, bus=1):
+        if SMBus is None:
+            raise ImportError("I2CBus needs smbus2")
+        self.bus = SMBus(bus)
+        self.transfers = 0
+
+    def readinto(self, address, register, buf):
+        write = i2c_msg.write(address, [register])
+        read = i2c_msg.read(address, len(buf))
+        self.bus.i2c_rdwr(write, read)
+        buf[:] = bytes(read)
+        self.transfers += 1
+
+    def close(self):
+        self.bus.close()
+
+
+class SampleRing(object):
+    """
+    Preallocated ring of decoded samples.
+
+    - input:
+        - capacity: int
+        - fields: tuple of string
+    """
+    def __init__(self, capacity, fields):
+        self.dtype = np.dtype([('time', np.float64)] + [(f, np.float64) for f in fields])
+        self.samples = np.zeros(capacity, dtype=self.dtype)
+        self.capacity = capacity
+        self.written = 0
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def slot(self):
+        """
+        Row the next sample goes into, the caller fills it then commit()s.
+        """
+        return self.samples[self.written % self.capacity]
+
+    def commit(self):
+        self.written += 1
+
+    def latest(self, n=1):
+        """
+        The newest n samples, oldest first (a copy).
+        """
+        n = min(n, len(self))
+        idx = (np.arange(self.written - n, self.written)) % self.capacity
+        return self.samples[idx]
+
+    def stats(self):
+        rows = self.latest(len(self))
+        return {f: {"min": float(rows[f].min()), "max": float(rows[f].max()),
+                    "mean": float(rows[f].mean())}
+                for f in self.dtype.names[1:]} if len(rows) else {}
+
+
+class Poller(object):
+    """
+    Poll one device's register block at a fixed rate.
+
+    - input:
+        - bus: SimulatedBus, I2CBus or anything with readinto(address, register, buf)
+        - address: int
+        - layout: Layout
+        - capacity: int
+            Samples kept in the ring.
+    """
+    def __init__(self, bus, address=ATMOSPHERE_ADDRESS, layout=ATMOSPHERE, capacity=4096):
+        self.bus = bus
+        self.address = address
+        self.layout = layout
+        self.ring = SampleRing(capacity, layout.fields)
+        self._buf = bytearray(layout.size)
+        self._scale = [(i + 1, layout.scale.get(f, 1.0)) for i, f in enumerate(layout.fields)]
+        self.latencies = np.zeros(capacity)
+        self.reads = 0
+        self.errors = 0
+        self.started = None
+
+    def poll(self):
+        """
+        One bulk read and decode into the ring.
+        """
+        clock = time.perf_counter
+        begin = clock()
+        try:
+            self.bus.readinto(self.address, self.layout.start, self._buf)
+        except OSError:
+            self.errors += 1
+            return False
+        values = self.layout.struct.unpack_from(self._buf)
+        row = self.ring.slot()
+        row[0] = time.time()
+        for (i, scale), value in zip(self._scale, values):
+            row[i] = value*scale
+        self.ring.commit()
+        self.latencies[self.reads % len(self.latencies)] = clock() - begin
+        self.reads += 1
+        return True
+
+    def run(self, rate=100.0, cycles=None, duration=None):
+        """
+        Poll on absolute ticks of 1/rate seconds, skipping ticks we overran.
+        """
+        period = 1.0/rate
+        clock = time.perf_counter
+        start = self.started = clock()
+        end = start + duration if duration is not None else float('inf')
+        tick = done = 0
+        while cycles is None or done < cycles:
+            deadline = start + tick*period
+            if deadline >= end:
+                break
+            delay = deadline - clock()
+            if delay > 0:
+                time.sleep(delay)
+            self.poll()
+            done += 1
+            tick = max(tick + 1, int((clock() - start)/period))
+        self.elapsed = clock() - start
+        return self
+
+    def report(self):
+        n = min(self.reads, len(self.latencies))
+        lat = self.latencies[:n] if n else np.zeros(1)
+        elapsed = getattr(self, 'elapsed', 0.0)
+        return {
+            "reads": self.reads,
+            "errors": self.errors,
+            "rate": self.reads/elapsed if elapsed else 0.0,
+            "latency_us": {
+                "p50": float(np.percentile(lat, 50))*1e6,
+                "p99": float(np.percentile(lat, 99))*1e6,
+                "max": float(lat.max())*1e6,
+            },
+            "healthy": bool(len(self.ring) and
+                            self.ring.latest()['status'][0] == REGISTER_STATUS),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stage 2 sensor polling')
+    parser.add_argument('--rate', type=float, default=100.0)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--i2c', type=int, default=None, help='I2C bus number, simulated when omitted')
+    args = parser.parse_args()
+    bus = I2CBus(args.i2c) if args.i2c is not None else simulated_atmosphere()
+    poller = Poller(bus).run(args.rate, duration=args.seconds)
+    print(poller.report())
+    print(poller.ring.stats())
+    bus.close()
@@ -1,13 +1,27 @@
 """
 Service worker to run offline.
 """
-import pandas as pd
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../'))
+
+from shared import manifest
 
 # complete - @TODO(aaronhma, rohan): Step 1. Load service_worker.json
-service_worker = pd.read_json('./service_worker.json') # load the json file
+# parsed on the first lookup, then kept as a dict keyed by short_name
+service_worker = manifest.ManifestStore(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service_worker.json'))
+
+def stage2():
+    """
+    - output:
+        - stage 2 entry of the manifest
+    """
+    return service_worker['atlas_stage2'] # select only stage2 data
 
-service_workerx = service_worker.loc[service_worker.short_name == f'atlas_stage2'] # select only stage2 data
-print(service_workerx) # print filtered data
-print("\n\n") # sep
-print(service_worker.head()) # show all data
-# todo - @TODO(aaronhma, rohan): Make stage 2 offline
\ No newline at end of file
+if __name__ == "__main__":
+    print(stage2()) # print filtered data
+    print("\n\n") # sep
+    for entry in service_worker: # show all data
+        print(entry)
+# todo - @TODO(aaronhma, rohan): Make stage 2 offline
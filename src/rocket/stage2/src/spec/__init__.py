@@ -1,11 +1,12 @@
 from . import radiation_test as test_radiation
 from . import config
+from . import bist
 
 if __name__ == "__main__":
   try:
     test_radiation.test()
   except AssertionError as err:
     if config.dev_mode != False:
-      raise AssertionErrror(err)
+      raise AssertionError(err)
     else:
       raise AssertionError("The flight computer has radiation in it. Please reboot it and contact Mission Control.")
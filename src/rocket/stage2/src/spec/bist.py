@@ -0,0 +1,289 @@
+"""
+       _______ _                _____
+    /\|__   __| |        /\    / ____|
+   /  \  | |  | |       /  \  | (___
+  / /\ \ | |  | |      / /\ \  \___ \
+ / ____ \| |  | |____ / ____ \ ____) |
+/_/    \_\_|  |______/_/    \_\_____/
+
+This file is part of Atlas and Firebolt Space Agency.
+
+Licensed under the MIT License
+
+Built-in self-test (BIST) for the flight computer.
+
+A background thread runs a battery of checks, each on its own period:
+the arithmetic checks from radiation_test, and CRC32 checksums over
+large buffers filled with a known pattern, which catch bit flips in
+memory. Every result goes into a fixed-size ring memory-mapped from
+logs/bist.ring, so the history survives a reboot and never grows.
+Results name their check by a CRC32 of its name, so they still match
+after checks are added, removed or reordered:
+
+    python bist.py --seconds 5
+"""
+import argparse
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+try:
+    from . import radiation_test
+except ImportError:                     # Run as a script
+    import radiation_test
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))), 'logs', 'bist.ring')
+MAGIC = b'BIST'
+VERSION = 2
+HEADER = struct.Struct('<4sHHQ')        # magic, version, record size, results written
+RESULT = np.dtype([('time', '<f8'), ('check', '<u4'), ('passed', 'u1'), ('duration', '<f8')])
+
+
+def check_id(name):
+    """
+    CRC32 of a check's name, what History stores instead of the name.
+    """
+    return zlib.crc32(name.encode('utf-8'))
+
+
+class Check(object):
+    """
+    One self-test.
+
+    - input:
+        - name: string
+        - run: function() -> bool
+            True when the hardware passed.
+        - period: float
+            Seconds between runs.
+    """
+    def __init__(self, name, run, period=1.0):
+        self.name = name
+        self.run = run
+        self.period = period
+
+    @property
+    def id(self):
+        """
+        Stable id stored with the check's results.
+        """
+        return check_id(self.name)
+
+
+class PatternCheck(Check):
+    """
+    CRC32 over a buffer of known contents, compared with the CRC taken
+    when it was filled. Any bit flip in the buffer fails it.
+
+    - input:
+        - nbytes: int
+        - arena: memory.Arena
+            Take the buffer from the Stage 2 arena instead of the heap,
+            so the check covers the memory the flight code uses.
+    """
+    def __init__(self, name, nbytes=1024*1024, period=10.0, arena=None, seed=0):
+        self.buffer = arena.allocate('bist', (nbytes,), np.uint8) if arena is not None else None
+        data = self.buffer.array if self.buffer is not None else np.empty(nbytes, dtype=np.uint8)
+        # alternating bits per byte position plus a pseudo random part,
+        # so both stuck-at and coupling faults change the checksum
+        data[:] = np.random.default_rng(seed).integers(0, 256, nbytes, dtype=np.uint8)
+        data[::2] = 0xAA
+        self.data = data
+        self.expected = zlib.crc32(data)
+        super(PatternCheck, self).__init__(name, self.verify, period)
+
+    def verify(self):
+        return zlib.crc32(self.data) == self.expected
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.release()
+
+
+def arithmetic():
+    """
+    The radiation_test checks as one Check each.
+    """
+    cases = (
+        ('add_3_7', radiation_test.test_add_3_7, 10),
+        ('divide_360_6', radiation_test.test_divide_360_6, 60),
+        ('multiply_6_90', radiation_test.test_multiply_6_90, 540),
+        ('subtract_252_464', radiation_test.test_subtract_252_464, -210),
+    )
+    return [Check(name, lambda f=f, v=v: f() == v) for name, f, v in cases]
+
+
+def battery(arena=None, pattern_bytes=1024*1024, patterns=2):
+    """
+    The default checks: arithmetic every second, `patterns` pattern
+    buffers of `pattern_bytes` every 10 seconds. The patterns stay
+    allocated for the whole flight, by default 2 MiB, 1/32 of the
+    Stage 2 arena.
+    """
+    checks = arithmetic()
+    checks += [PatternCheck('pattern_{}'.format(i), pattern_bytes, arena=arena, seed=i)
+               for i in range(patterns)]
+    return checks
+
+
+class History(object):
+    """
+    Fixed-capacity ring of results in a memory-mapped file.
+
+    - input:
+        - path: string
+        - capacity: int
+            Results kept, the oldest are overwritten.
+    """
+    def __init__(self, path=HISTORY_FILE, capacity=65536):
+        self.path = path
+        size = HEADER.size + capacity*RESULT.itemsize
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        if not fresh:
+            with open(path, 'rb') as file:
+                magic, version, itemsize, written = HEADER.unpack(file.read(HEADER.size))
+            fresh = magic != MAGIC or version != VERSION or itemsize != RESULT.itemsize
+        if fresh:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, VERSION, RESULT.itemsize, 0))
+                file.truncate(size)
+        self._map = np.memmap(path, dtype=np.uint8, mode='r+', shape=(size,))
+        self.results = self._map[HEADER.size:].view(RESULT)
+        self.capacity = capacity
+        self.written = HEADER.unpack_from(self._map)[3]
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def append(self, t, check, passed, duration):
+        """
+        Record one run of the check with id `check` (see check_id).
+        """
+        row = self.results[self.written % self.capacity]
+        row['time'], row['check'], row['passed'], row['duration'] = t, check, passed, duration
+        self.written += 1
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RESULT.itemsize, self.written)
+
+    def flush(self):
+        self._map.flush()
+
+    def latest(self, n=None):
+        """
+        The newest n results (all by default), oldest first (a copy).
+        """
+        n = len(self) if n is None else min(n, len(self))
+        return self.results[np.arange(self.written - n, self.written) % self.capacity]
+
+
+class Scheduler(object):
+    """
+    Runs checks in the background whenever they are due.
+
+    - input:
+        - checks: list of Check
+        - history: History
+        - on_failure: function(check, result)
+            Called from the scheduler thread when a check fails.
+    """
+    def __init__(self, checks, history=None, on_failure=None):
+        self.checks = list(checks)
+        self.history = history if history is not None else History()
+        self.on_failure = on_failure
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_check(self, index):
+        check = self.checks[index]
+        clock = time.perf_counter
+        begin = clock()
+        try:
+            passed = bool(check.run())
+        except Exception:
+            # whatever a corrupted computer throws is a failed run, and
+            # the other checks keep running
+            passed = False
+        duration = clock() - begin
+        self.history.append(time.time(), check.id, passed, duration)
+        if not passed:
+            self.failures += 1
+            if self.on_failure is not None:
+                self.on_failure(check, self.history.latest(1)[0])
+        return passed
+
+    def run_once(self):
+        """
+        Every check now, on the calling thread.
+
+        returns:
+            - True when they all passed
+        """
+        passed = all([self.run_check(i) for i in range(len(self.checks))])
+        self.history.flush()
+        return passed
+
+    def _run(self):
+        clock = time.monotonic
+        due = [clock()]*len(self.checks)
+        while not self._stop.is_set():
+            now = clock()
+            for i, check in enumerate(self.checks):
+                if due[i] <= now:
+                    self.run_check(i)
+                    # next slot on the check's own grid, skipping any we overran
+                    due[i] += max(1, int((clock() - due[i])/check.period) + 1)*check.period
+            self.history.flush()
+            self._stop.wait(max(min(due) - clock(), 0))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='bist', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.history.flush()
+
+    def stats(self):
+        """
+        Runs, failures and duration percentiles per check, over the history.
+        """
+        rows = self.history.latest()
+        report = {}
+        for check in self.checks:
+            mine = rows[rows['check'] == check.id]
+            durations = mine['duration'] if len(mine) else np.zeros(1)
+            report[check.name] = {
+                "runs": int(len(mine)),
+                "failures": int((mine['passed'] == 0).sum()),
+                "last": float(mine['time'][-1]) if len(mine) else None,
+                "duration_ms": {
+                    "mean": float(durations.mean())*1e3,
+                    "p99": float(np.percentile(durations, 99))*1e3,
+                    "max": float(durations.max())*1e3,
+                },
+            }
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stage 2 built-in self-test')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--pattern-mb', type=int, default=1)
+    args = parser.parse_args()
+    scheduler = Scheduler(battery(pattern_bytes=args.pattern_mb*1024*1024), History(args.history),
+                          on_failure=lambda check, result: print("FAILED", check.name))
+    scheduler.start()
+    time.sleep(args.seconds)
+    scheduler.stop()
+    for name, stats in scheduler.stats().items():
+        print(name, stats)
@@ -17,6 +17,8 @@ All Rights Reserved.
 Licensed under the MIT License
 
 Helper file for testing if hardware has no radiation.
+
+test() runs the checks once, bist.py runs them periodically in the background.
 """
 #
 # MIT License
@@ -55,7 +57,10 @@ try:
        from . import spec_ram
 
 except ImportError:
-       raise ImportError("Your version of Atlas is corrupt!")
+       try:
+              import spec_ram # Run as a script
+       except ImportError:
+              raise ImportError("Your version of Atlas is corrupt!")
 
 # @TODO(aaronhma): Create generic functions for these
 def add(x, y):
@@ -74,7 +79,7 @@ def multiply(x, y):
        return x * y
 
 def divide(x, y):
-       retrun y / x
+       return y / x
 
 def test_add_3_7():
     return 3 + 7
@@ -113,15 +118,6 @@ def test():
         ctime = time.ctime()
         print("Last checked: {}".format(ctime))
         spec_ram.last_checked.append(ctime)
-        lc = input("Would you like to see all the last checked time? (Y/n)")
-              
-        # User entered yes
-        if lc != 'Y' or 'y':
-            print(spec_ram.last_checked)
-        
-        # Anything else
-        else:
-            pass
     
     # Test failed
     else:
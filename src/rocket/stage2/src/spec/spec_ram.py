@@ -17,4 +17,6 @@ Licensed under the MIT License
 
 Helper file for holding RAM for spec folder.
 """
-last_checked = []
\ No newline at end of file
+import collections
+
+last_checked = collections.deque(maxlen=100) # newest check times, see bist.History for all results
\ No newline at end of file